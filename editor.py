@@ -1,38 +1,27 @@
 import pygame
 import sys
-from scripts.utility import load_images
+from scripts.assets import AssetRegistry, TILE_TYPES
 from scripts.tilemap import Tilemap
+from scripts.output import Output, parse_size
 
-RENDER_SCALE_X = 2
-RENDER_SCALE_Y = 2
 RES_WIDTH = 1920
 RES_HEIGHT = 1080
 
 class Editor:
-    def __init__(self):
+    # output_size - rozdzielczość obrazu edytora na ekranie (szerokość, wysokość); domyślnie cały ekran
+    def __init__(self, output_size=None):
         pygame.init()
 
         pygame.display.set_caption("Editor")
         self.screen = pygame.display.set_mode((RES_WIDTH, RES_HEIGHT))
         self.display = pygame.Surface((RES_WIDTH/2, RES_HEIGHT/2))
+        self.output = Output(self.screen, self.display, output_size)
 
         self.clock = pygame.time.Clock()
 
-        self.assets = {
-            "grass": load_images("tiles/grass"),
-            "stone": load_images("tiles/stone"),
-            "Evil-Purple": load_images("tiles/Evil-Purple"),
-            "Pyramid-Yellow": load_images("tiles/Pyramid-Yellow"),
-            "Castle-blue": load_images("tiles/Castle-blue"),
-            "Diamond-Blue": load_images("tiles/Diamond-Blue"),
-            "Emerald-Green": load_images("tiles/Emerald-Green"),
-            "grass_purple": load_images("tiles/grass_purple"),
-            "grass_thick_snow": load_images("tiles/grass_thick_snow"),
-            "plain_snow": load_images("tiles/plain_snow"),
-            "ice": load_images("tiles/ice"),
-            "win_tiles": load_images("tiles/win_tiles"),
-
-        }
+        # Paleta edytora potrzebuje wszystkich typów klocków
+        self.assets = AssetRegistry()
+        self.assets.acquire(TILE_TYPES)
 
         self.movement = [False, False, False, False]
 
@@ -45,7 +34,7 @@ class Editor:
 
         self.scroll = [0, 0]
 
-        self.tile_list = list(self.assets)
+        self.tile_list = list(TILE_TYPES)
         self.tile_group = 0
         self.tile_variant = 0
 
@@ -71,8 +60,10 @@ class Editor:
             current_tile_img = self.assets[self.tile_list[self.tile_group]][self.tile_variant].copy()
             current_tile_img.set_alpha(100)
 
+            # Pozycja myszy na powierzchni display (bez zaokrąglania - klocki poza gridem stoją na połówkach pikseli)
             mpos = pygame.mouse.get_pos()
-            mpos = (mpos[0] / RENDER_SCALE_X, mpos[1] / RENDER_SCALE_Y)
+            mpos = ((mpos[0] - self.output.position[0]) * self.display.get_width() / self.output.size[0],
+                    (mpos[1] - self.output.position[1]) * self.display.get_height() / self.output.size[1])
 
             tile_pos = (int((mpos[0] + self.scroll[0]) // self.tilemap.tile_size),
                         int((mpos[1] + self.scroll[1]) // self.tilemap.tile_size))
@@ -84,19 +75,17 @@ class Editor:
                 self.display.blit(current_tile_img, mpos)
 
             if self.clicking and self.ongrid:
-                self.tilemap.tilemap[str(tile_pos[0]) + ";" + str(tile_pos[1])] = {
-                    "type": self.tile_list[self.tile_group], "variant": self.tile_variant, "pos": tile_pos}
+                self.tilemap.add_tile(tile_pos, self.tile_list[self.tile_group], self.tile_variant)
 
             if self.right_clicking:
-                tile_loc = str(tile_pos[0]) + ";" + str(tile_pos[1])
-                if tile_loc in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_loc]
-                for tile in self.tilemap.offgrid_tiles.copy():
+                self.tilemap.remove_tile(tile_pos)
+                for tile in self.tilemap.offgrid_in_rect(pygame.Rect(int(mpos[0] + self.scroll[0]) - 1,
+                                                                     int(mpos[1] + self.scroll[1]) - 1, 3, 3)):
                     tile_img = self.assets[tile["type"]][tile["variant"]]
                     tile_r = pygame.Rect(tile["pos"][0] - self.scroll[0], tile["pos"][1] - self.scroll[1],
                                          tile_img.get_width(), tile_img.get_height())
                     if tile_r.collidepoint(mpos):
-                        self.tilemap.offgrid_tiles.remove(tile)
+                        self.tilemap.remove_offgrid(tile)
             self.display.blit(current_tile_img, (5, 5))
             # Event handeler
             for event in pygame.event.get():
@@ -108,7 +97,7 @@ class Editor:
                     if event.button == 1:
                         self.clicking = True
                         if not self.ongrid:
-                            self.tilemap.offgrid_tiles.append(
+                            self.tilemap.add_offgrid(
                                 {"type": self.tile_list[self.tile_group], "variant": self.tile_variant,
                                  "pos": (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
                     if event.button == 3:
@@ -167,9 +156,10 @@ class Editor:
             # if self.player.jumping:
             #     pygame.draw.rect(self.display, (0, 0, 0), self.player.rect())
 
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
+            self.output.present()
             pygame.display.update()
             self.clock.tick(60)  # ograniczenie do 60fps
 
 
-Editor().run()
+# python editor.py [--output 1280x720] - rozdzielczość obrazu edytora (wyśrodkowanego na ekranie)
+Editor(parse_size(sys.argv[2]) if sys.argv[1:2] == ["--output"] else None).run()
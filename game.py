@@ -1,16 +1,31 @@
 import sys
-import time
 
 import pygame
 
+from scripts.assets import AssetRegistry, PLAYER_ANIMATIONS, CLOUD_LEVELS
 from scripts.audio import Audio
+from scripts.background import Backgrounds
 from scripts.clouds import Clouds
-from scripts.entities import Player
+from scripts.leaderboard import Leaderboard
+from scripts.entities import Player, TICK_RATE
+from scripts.ghost import Ghost
+from scripts.output import Output, parse_size
+from scripts.ranking import parse_time
+from scripts.screen import Screen
+from scripts.replay import Replay, BUILD, REPLAY_DIR, best_replay, map_crc, save_run
+from scripts.simulation import Simulation, LEFT, RIGHT, JUMP, PAUSE, LEVELS, level_path
+from scripts.text import render_text
 from scripts.tilemap import Tilemap
-from scripts.utility import load_image, load_images, Animation, save_to_excel, load_from_excel
+from scripts.utility import get_image
 
 RES_WIDTH = 1920
 RES_HEIGHT = 1080
+# Długość kroku symulacji w sekundach
+TICK = 1 / TICK_RATE
+# Najdłuższy czas klatki nadrabiany przez symulację (po dłuższej przerwie gra po prostu zwalnia)
+MAX_FRAME_TIME = 0.25
+# Klawisze sterowania -> akcje gracza w symulacji
+KEY_ACTIONS = {pygame.K_a: LEFT, pygame.K_d: RIGHT, pygame.K_w: JUMP}
 
 
 # Klasa do Tworzenia przycisków
@@ -24,14 +39,15 @@ class Button:
         self.offset = (offset_x, offset_y)
 
         # Załaduj i ewentualnie odwróć obraz
-        original_image = pygame.image.load(image_path).convert_alpha()
+        original_image = get_image(image_path)
         if flip_x or flip_y:
             original_image = pygame.transform.flip(original_image, flip_x, flip_y)
 
         self.original_image = original_image
         self.image = self._scale_image_pixel_art(self.original_image, width, height)
         self.highlight = highlight
-        self.font = pygame.font.Font(font_path, font_size)
+        self.font_path = font_path
+        self.font_size = font_size
         self.hover_image = self._create_hover_image(self.image)
 
     def _create_hover_image(self, image):
@@ -64,7 +80,7 @@ class Button:
         else:
             screen.blit(self.image, image_rect)
 
-        text_surface = self.font.render(self.text, True, (150, 40, 20))
+        text_surface = render_text(self.text, (150, 40, 20), self.font_path, self.font_size)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -73,28 +89,11 @@ class Button:
             mouse_pos = pygame.mouse.get_pos()
         return self.rect.collidepoint(mouse_pos)
 
-    @staticmethod
-    def get_scaled_mouse_pos(self, screen, display):
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        scale_x = display.get_width() / screen.get_width()
-        scale_y = display.get_height() / screen.get_height()
-        return int(mouse_x * scale_x), int(mouse_y * scale_y)
-
-
-def clean_transparent_pixels(surface, replace_with=(0, 0, 0, 0)):
-    width, height = surface.get_size()
-    for x in range(width):
-        for y in range(height):
-            r, g, b, a = surface.get_at((x, y))
-            if a == 0:
-                # Ustaw przezroczyste piksele na neutralny kolor (np. brąz z alhpa 0)
-                surface.set_at((x, y), replace_with)
-    return surface
-
 
 # Główna klasa gry
 class Game:
-    def __init__(self):
+    # output_size - rozdzielczość obrazu gry na ekranie (szerokość, wysokość); domyślnie cały ekran
+    def __init__(self, ghost=False, output_size=None):
         pygame.init()
         # Podstawowe atrybuty dotyczące rozmiaru i tytułu okna, wraz z ograniczeniem fps
         pygame.display.set_caption("Platform Jumper")
@@ -104,53 +103,48 @@ class Game:
         pygame.mouse.set_visible(False)
         self.screen = pygame.display.set_mode((RES_WIDTH, RES_HEIGHT))
         self.display = pygame.Surface((RES_WIDTH / 2, RES_HEIGHT / 2))
-        self.cursor_image = pygame.image.load("data/images/cursor1.png").convert_alpha()
+        self.cursor_image = get_image("data/images/cursor1.png")
         self.cursor_offset = (30, 32)
         self.clock = pygame.time.Clock()
-        # Atrybuty dotyczące movementu i startowa pozycja gracza
-        self.movement = [False, False]
+        # Startowa pozycja gracza
         self.player_startpos = (1, 200)
-        # Słownik z teksturami używający funkcji "load_images" z pliku utility do załadowania png
-        self.assets = {
-            "grass": load_images("tiles/grass"),
-            "stone": load_images("tiles/stone"),
-            "Evil-Purple": load_images("tiles/Evil-Purple"),
-            "Pyramid-Yellow": load_images("tiles/Pyramid-Yellow"),
-            "Castle-blue": load_images("tiles/Castle-blue"),
-            "Diamond-Blue": load_images("tiles/Diamond-Blue"),
-            "Emerald-Green": load_images("tiles/Emerald-Green"),
-            "grass_purple": load_images("tiles/grass_purple"),
-            "grass_thick_snow": load_images("tiles/grass_thick_snow"),
-            "plain_snow": load_images("tiles/plain_snow"),
-            "ice": load_images("tiles/ice"),
-            "win_tiles": load_images("tiles/win_tiles"),
-            "Winter Wilds": load_image("WWilds.png"),
-            "Galactic Tower": load_image("GTower.jpg"),
-            "Corrupted Fields": load_image("CFields.png"),
-            "clouds": load_images("clouds"),
-            "player": load_image("player_correct.png"),
-            "player/idle": Animation(load_images("entities/player/idle"), img_dur=10),
-            "player/run": Animation(load_images("entities/player/run"), img_dur=10),
-            "player/jump": Animation(load_images("entities/player/jump"), img_dur=4),
-            "player/fall": Animation(load_images("entities/player/fall")),
-            "player/crouch": Animation(load_images("entities/player/crouch"), img_dur=4),
-            "bar_jumping": load_image("bar_jumping.png"),
-        }
-        # Stworzenie chmur z użyciem klasy z pliku clouds
-        self.clouds = Clouds(self.assets["clouds"], count=16)
-        # Stworzenie "gracza" używając klasy z pliku entities, podając pozycję startową i wielkość postaci
-        self.player = Player(self, self.player_startpos, (16, 28))
+        # Rejestr tekstur (wspólny z edytorem) - na start potrzebne jest tylko menu,
+        # tekstury poziomu wczytywane są przy wejściu na poziom
+        self.assets = AssetRegistry()
+        # Ranking wyników trzymany w pamięci
+        self.leaderboard = Leaderboard(top_n=3)
+        # Przeskalowane tła poziomów
+        self.backgrounds = Backgrounds(self)
+        # Chmury obecnego poziomu (None - poziom bez chmur)
+        self.clouds = None
+        # Gracz tworzony przy wejściu na poziom (run) - menu nie potrzebuje jego animacji ani dźwięków
+        self.player = None
         # Stworzenie mapy klocków używając klasy z pliku tilemap
         self.tilemap = Tilemap(self, tile_size=16)
         # Atrybut scroll do poruszania się kamery za graczem
         self.scroll = [0, 0]
-        # Atrybut z czasem rozpoczęcia gry to późniejszego liczenia go i wyświetlania
-        self.start_time = 0
+        self.prev_scroll = [0, 0]
+        # Symulacja fizyki poziomu (tworzona przy starcie poziomu)
+        self.simulation = None
+        # Odtwarzana powtórka (None - gra sterowana z klawiatury)
+        self.playback = None
+        # Każdy przebieg poziomu jest zapisywany (raz, przy końcu poziomu) w katalogu powtórek
+        self.replay_dir = REPLAY_DIR
+        self.replay_saved = False
+        # Duch najlepszego przebiegu poziomu (włączany opcją ghost) i ścieżka jego powtórki
+        self.ghost_enabled = ghost
+        self.ghost = None
+        self.ghost_path = None
         # Załadowanie tła menu i przeskalowanie go
-        self.background_menu_original = pygame.image.load("data/images/menu_bg2.jpg").convert()
+        self.background_menu_original = get_image("data/images/menu_bg2.jpg", alpha=False)
         self.background_menu = self._scale_pixel_art_image(self.background_menu_original, RES_WIDTH, RES_HEIGHT)
+        # Skalowanie obrazu gry na ekran (po ostatnim set_mode)
+        self.output = Output(self.screen, self.display, output_size)
         # Atrybut z obecnym poziomem
         self.current_level = None
+        # Stan ekranu ładowania
+        self.loading = False
+        self.loading_drawn = 0
         # Add audio instance
         self.audio = Audio(self)
         # zmienne pomocnicze do setting i help
@@ -163,36 +157,111 @@ class Game:
                                 "data/images/banner_scroll_wide_thin.png", highlight=False)
         self.settings_text = Button('Tutaj będzie Settings', RES_WIDTH / 2 - 450, RES_HEIGHT / 2 - 125 + 10, 1000, 250,
                                     "data/images/banner_scroll_wide_thin.png", highlight=False)
+        # Ekrany z przyciskami tworzonymi raz, przy pierwszym wyświetleniu
+        self.screens = {
+            "main_menu": Screen(self._build_main_menu),
+            "level_picker": Screen(self._build_level_picker),
+            "pause": Screen(self._build_pause_menu),
+            "summary": Screen(self._build_summary),
+        }
+
+    # Przyciski menu głównego
+    def _build_main_menu(self):
+        return {
+            "authors": Button('Tomasz Nazar', RES_WIDTH * 0.75, RES_HEIGHT * 0.7 - 20, 350, 300,
+                              "data/images/banner_left.png", font_size=19, highlight=False, offset_x=25, offset_y=20),
+            "author_1": Button('Filip Pietrzak', RES_WIDTH * 0.75 + 10, RES_HEIGHT * 0.7 + 25, 350, 300,
+                               "data/images/transparent.png", font_size=17, highlight=False, offset_x=25, offset_y=20),
+            "pole": Button('', RES_WIDTH * 0.75, RES_HEIGHT * 0.8 - 50, 400, 300, "data/images/pole.png",
+                           font_size=18, offset_y=20, highlight=False),
+            "title": Button('Platform Jumper', RES_WIDTH / 2 - 470, RES_HEIGHT / 2 - 400, 940, 350,
+                            "data/images/banner_title.png", font_size=45, offset_y=-10, highlight=False),
+            "play": Button('Play', RES_WIDTH / 2 - 180, RES_HEIGHT / 2 - 60, 360, 150,
+                           "data/images/banner_scroll_wide.png"),
+            "exit": Button('Exit', RES_WIDTH / 2 - 180, RES_HEIGHT / 2 + 90, 360, 150,
+                           "data/images/banner_scroll_wide.png"),
+        }
+
+    # Przyciski wyboru poziomu
+    def _build_level_picker(self):
+        return {
+            "arrow": Button('', RES_WIDTH * 0.01, RES_HEIGHT * 0.02, 125, 125, "data/images/arrow.png", flip_x=True),
+            "select_level": Button('Select Level', RES_WIDTH / 2 - 470, RES_HEIGHT / 2 - 400, 940, 350,
+                                   "data/images/banner_title.png", font_size=45, offset_y=-10, highlight=False),
+            "levels": [Button(level, RES_WIDTH / 2 - 265, RES_HEIGHT / 2 - 50 + i * 120, 530, 110,
+                              "data/images/banner_scroll_wide_thin.png", 0, 0, font_size=25) for i, level in
+                       enumerate(LEVELS)],
+        }
+
+    # Przyciski menu pauzy
+    def _build_pause_menu(self):
+        # Wymiary przycisków jako % ekranu
+        banner_w = RES_WIDTH * 0.3
+        banner_h = RES_HEIGHT * 0.075
+        button_w = RES_WIDTH * 0.2
+        button_h = RES_HEIGHT * 0.06
+        x_center = RES_WIDTH / 4 - button_w / 2
+
+        # Skalowanie rozmiaru czcionki proporcjonalnie do wysokości ekranu
+        font_size = int(RES_HEIGHT * 0.025)
+        banner_font_size = int(RES_HEIGHT * 0.035)
+
+        # Pozycje przycisków (pionowo)
+        spacing = RES_HEIGHT * 0.075
+        y_start = RES_HEIGHT * 0.075
+        return {
+            "resume": Button('Resume', x_center, y_start + spacing * 1, button_w, button_h,
+                             "data/images/banner_scroll_wide_thin.png", font_size=font_size, highlight=True),
+            "restart": Button('Restart', x_center, y_start + spacing * 2, button_w, button_h,
+                              "data/images/banner_scroll_wide_thin.png", font_size=font_size, highlight=True),
+            "menu": Button('Main menu', x_center, y_start + spacing * 3, button_w, button_h,
+                           "data/images/banner_scroll_wide_thin.png", font_size=font_size - 2, highlight=True),
+            "quit": Button('Quit', x_center, y_start + spacing * 4, button_w, button_h,
+                           "data/images/banner_scroll_wide_thin.png", font_size=font_size, highlight=True),
+            # Przycisk PAUSED jako banner (bez akcji, tylko wizualnie)
+            "paused": Button('PAUSED', RES_WIDTH / 4 - banner_w / 2, RES_HEIGHT * 0.0375, banner_w, banner_h,
+                             "data/images/banner_scroll_wide_thin.png", font_size=banner_font_size,
+                             highlight=False),
+        }
+
+    # Bannery ekranu podsumowania
+    def _build_summary(self):
+        return {
+            "win_banner": Button('You won!', RES_WIDTH / 2 - RES_WIDTH * 0.225, RES_HEIGHT / 2 - RES_HEIGHT * 0.45,
+                                 RES_WIDTH * 0.45, RES_HEIGHT * 0.3, "data/images/banner_title.png", font_size=55,
+                                 offset_y=-10, highlight=False),
+            "win_banner2": Button('', RES_WIDTH * 0.01, RES_HEIGHT * 0.18, RES_WIDTH * 0.98, RES_HEIGHT * 0.8,
+                                  "data/images/banner_big_hanging2.png", font_size=55, offset_y=-10, highlight=False),
+            "inputbox": Button('', RES_WIDTH * 0.375, RES_HEIGHT * 0.3, RES_WIDTH * 0.25, RES_HEIGHT * 0.32 + 250,
+                               "data/images/bar_jumping.png", font_size=55, offset_y=-10, highlight=False),
+        }
 
     # Metoda do resetowania atrybutów przed kolejnym rozpoczęciem rozgrywki
     def reset(self):
-        self.movement = [False, False]
         # Win pos
         #self.player_startpos = (100, -1700)
         self.player_startpos = (1, 200)
-        self.player = Player(self, self.player_startpos, (16, 28))
+        self.player = None
         self.scroll = [0, 0]
-        self.start_time = pygame.time.get_ticks()
+        self.prev_scroll = [0, 0]
         self.current_level = None
-        self.player.win = False
-        self.player.total_jumps = 0
 
     # Metoda tworząca i wyświetlająca main menu
     def main_menu(self):
-        # Stworzenie przycisków "Play" i "Exit" używając klasy Button
-        authors_button = Button('Tomasz Nazar', RES_WIDTH * 0.75, RES_HEIGHT * 0.7 - 20, 350, 300,
-                                "data/images/banner_left.png", font_size=19, highlight=False, offset_x=25, offset_y=20)
-        author_1 = Button('Filip Pietrzak', RES_WIDTH * 0.75 + 10, RES_HEIGHT * 0.7 + 25, 350, 300,
-                          "data/images/transparent.png", font_size=17, highlight=False, offset_x=25, offset_y=20)
-        pole = Button('', RES_WIDTH * 0.75, RES_HEIGHT * 0.8 - 50, 400, 300, "data/images/pole.png", font_size=18,
-                      offset_y=20, highlight=False)
-        title_button = Button('Platform Jumper', RES_WIDTH / 2 - 470, RES_HEIGHT / 2 - 400, 940, 350,
-                              "data/images/banner_title.png", font_size=45, offset_y=-10, highlight=False)
-        play_button = Button('Play', RES_WIDTH / 2 - 180, RES_HEIGHT / 2 - 60, 360, 150,
-                             "data/images/banner_scroll_wide.png")
-        exit_button = Button('Exit', RES_WIDTH / 2 - 180, RES_HEIGHT / 2 + 90, 360, 150,
-                             "data/images/banner_scroll_wide.png")
-
+        # Przyciski menu (tworzone raz)
+        screen = self.screens["main_menu"]
+        authors_button = screen["authors"]
+        author_1 = screen["author_1"]
+        pole = screen["pole"]
+        title_button = screen["title"]
+        play_button = screen["play"]
+        exit_button = screen["exit"]
+
+        # Tekstury poziomu nie są potrzebne w menu
+        self.assets.leave_level()
+        self.playback = None
+        self.backgrounds.clear()
+        self.clouds = None
         # Play menu music once at menu entry
         self.audio.play_music('data/audio/menu_music.mp3', volume=0.20)
         # Głowna pętla menu czekająca na eventy od gracza
@@ -247,17 +316,13 @@ class Game:
 
     # Metoda do stworzenia i wyświetlenia menu z level_picker'em
     def level_picker(self):
-        # Tablica wszystkich poziomów
-        levels = ['Galactic Tower', 'Winter Wilds', 'Corrupted Fields']
+        levels = LEVELS
 
-        # Stworzenie przycisków
-        # return_button = Button('', RES_WIDTH/2-180, RES_HEIGHT/2+400, 360, 150, "data/images/banner_left.png")
-        arrow = Button('', RES_WIDTH * 0.01, RES_HEIGHT * 0.02, 125, 125, "data/images/arrow.png", flip_x=True)
-        select_level_button = Button('Select Level', RES_WIDTH / 2 - 470, RES_HEIGHT / 2 - 400, 940, 350,
-                                     "data/images/banner_title.png", font_size=45, offset_y=-10, highlight=False)
-        buttons = [Button(level, RES_WIDTH / 2 - 265, RES_HEIGHT / 2 - 50 + i * 120, 530, 110,
-                          "data/images/banner_scroll_wide_thin.png", 0, 0, font_size=25) for i, level in
-                   enumerate(levels)]
+        # Przyciski (tworzone raz)
+        screen = self.screens["level_picker"]
+        arrow = screen["arrow"]
+        select_level_button = screen["select_level"]
+        buttons = screen["levels"]
         # Główna pętla level_picker'a
         while True:
             for event in pygame.event.get():
@@ -312,13 +377,10 @@ class Game:
 
     # Metoda do wyświetlenia podsumowania po przejściu poziomu
     #TODO: DO NAPRAWY, DZIAŁA ALE WYGLĄDA BRZYDKO
-    def display_summary(self, ending_time):
-        font_32 = pygame.font.Font("data/fonts/font1.ttf", 32)
-        font_24 = pygame.font.Font("data/fonts/font1.ttf", 24)
-        font_20 = pygame.font.Font("data/fonts/font1.ttf", 20)
-        font_16 = pygame.font.Font("data/fonts/font1.ttf", 16)
-        font_10 = pygame.font.Font("data/fonts/font1.ttf", 10)
-
+    def display_summary(self, ending_time, ending_ms=None):
+        if ending_ms is None:
+            ending_ms = parse_time(ending_time)
+        font_path = "data/fonts/font1.ttf"
 
         input_active = True
         clock = pygame.time.Clock()
@@ -327,11 +389,17 @@ class Game:
         textcolor = pygame.Color(150, 40, 20)
         text = ''
         user_name = ''
-        cursor_img = pygame.image.load("data/images/cursor1.png").convert_alpha()
+        cursor_img = self.cursor_image
+        screen = self.screens["summary"]
+        self.win_banner = screen["win_banner"]
+        self.win_banner2 = screen["win_banner2"]
+        self.inputbox = screen["inputbox"]
 
         while input_active:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    # Wygrana bez wpisanej nazwy - powtórka poza rankingiem
+                    self.save_replay()
                     pygame.quit()
                     sys.exit()
                 if event.type == pygame.KEYDOWN:
@@ -349,31 +417,18 @@ class Game:
                             text += event.unicode
 
             # Rysowanie tła
-            background = pygame.transform.scale(self.assets[self.current_level], (self.screen.get_width(), self.screen.get_height()))
+            background = self.backgrounds.get(self.current_level, self.screen.get_size())
             self.screen.blit(background, (0, 0))
 
             # Teksty
-            self.win_banner = Button('You won!', RES_WIDTH / 2 - RES_WIDTH*0.225, RES_HEIGHT / 2 - RES_HEIGHT*0.45, RES_WIDTH*0.45, RES_HEIGHT*0.3,
-                              "data/images/banner_title.png", font_size=55, offset_y=-10, highlight=False)
-            self.win_banner2 = Button(
-                                         '',
-                                         RES_WIDTH * 0.01,
-                                         RES_HEIGHT * 0.18,
-                                         RES_WIDTH * 0.98,
-                                         RES_HEIGHT * 0.8,
-                                         "data/images/banner_big_hanging2.png",
-                                         font_size=55,
-                                         offset_y=-10,
-                                         highlight=False
-                                     )
             self.win_banner2.draw(self.screen)
             self.win_banner.draw(self.screen)
-            time_text = font_32.render("Time: " + ending_time, True, textcolor)
-            jumps_text = font_32.render("Jumps: " + str(self.player.total_jumps), True, textcolor)
-            username_text = font_24.render("Enter your name", True, textcolor)
-            end1_text = font_10.render("Press enter to confirm, then", True, textcolor)
-            end2_text = font_10.render("Press space to leave to main menu", True, textcolor)
-            leaderboard_text = font_16.render("Leaderboard", True, textcolor)
+            time_text = render_text("Time: " + ending_time, textcolor, font_path, 32)
+            jumps_text = render_text("Jumps: " + str(self.player.total_jumps), textcolor, font_path, 32)
+            username_text = render_text("Enter your name", textcolor, font_path, 24)
+            end1_text = render_text("Press enter to confirm, then", textcolor, font_path, 10)
+            end2_text = render_text("Press space to leave to main menu", textcolor, font_path, 10)
+            leaderboard_text = render_text("Leaderboard", textcolor, font_path, 16)
 
             self.screen.blit(time_text, ((self.screen.get_width() * 0.41), self.screen.get_height() * 0.3 + 50))
             self.screen.blit(jumps_text, ((self.screen.get_width() * 0.41), self.screen.get_height()  * 0.3 + 100))
@@ -382,22 +437,14 @@ class Game:
             self.screen.blit(end2_text, ((self.screen.get_width() *0.415), self.screen.get_height()  * 0.3 + 365))
             self.screen.blit(leaderboard_text, ((self.screen.get_width() *0.45), self.screen.get_height()  * 0.3 + 400))
 
-            best_players = 0
-            players = load_from_excel(self.current_level)
-            while best_players < 3 and best_players < len(players):
-                print(best_players+1,". ",players[best_players])
-                player_str = f"{best_players + 1}. {players[best_players]}"
-                players_text = font_10.render(player_str, True, textcolor)
+            for best_players, player_str in enumerate(self.leaderboard.top(self.current_level)):
+                players_text = render_text(player_str, textcolor, font_path, 10)
                 self.screen.blit(players_text,((self.screen.get_width() * 0.42), self.screen.get_height() * 0.3 + 430 + best_players * 30))
-                best_players += 1
 
             # Input box
-            txt_surface = font_20.render(text, True, textcolor)
+            txt_surface = render_text(text, textcolor, font_path, 20)
             width = max(400, txt_surface.get_width() + 10)
             input_box.w = width
-            self.inputbox = Button('', RES_WIDTH*0.375, RES_HEIGHT * 0.3,
-                                     RES_WIDTH * 0.25, RES_HEIGHT * 0.32 +250,
-                                     "data/images/bar_jumping.png", font_size=55, offset_y=-10, highlight=False)
             self.inputbox.draw(self.screen)
             self.screen.blit(txt_surface, (input_box.x + 5, input_box.y + 5 ))
 
@@ -410,9 +457,10 @@ class Game:
             pygame.display.flip()
             clock.tick(60)
 
-        # Jeśli użytkownik coś wpisał, zapisz do pliku
+        # Jeśli użytkownik coś wpisał, zapisz do pliku; powtórka z nazwą gracza to ta od wyniku w rankingu
         if user_name != "":
-            save_to_excel(user_name, ending_time, self.player.total_jumps, self.current_level)
+            replay = self.save_replay(user_name)
+            self.leaderboard.save(user_name, ending_ms, self.player.total_jumps, self.current_level, replay)
 
         # Czekanie na spację
         waiting = True
@@ -436,17 +484,12 @@ class Game:
             self.screen.blit(end2_text, ((self.screen.get_width() * 0.415), self.screen.get_height() * 0.3 + 365))
             self.screen.blit(leaderboard_text, ((self.screen.get_width() * 0.45), self.screen.get_height() * 0.3 + 400))
 
-            best_players = 0
-            players = load_from_excel(self.current_level)
-            while best_players < 3 and best_players < len(players):
-                print(best_players + 1, ". ", players[best_players])
-                player_str = f"{best_players + 1}. {players[best_players]}"
-                players_text = font_10.render(player_str, True, textcolor)
+            for best_players, player_str in enumerate(self.leaderboard.top(self.current_level)):
+                players_text = render_text(player_str, textcolor, font_path, 10)
                 self.screen.blit(players_text, ((self.screen.get_width() * 0.42),
                                                 self.screen.get_height() * 0.3 + 430 + best_players * 30))
-                best_players += 1
 
-            txt_surface = (font_20.render(user_name, True, textcolor))
+            txt_surface = render_text(user_name, textcolor, font_path, 20)
             self.screen.blit(txt_surface, (input_box.x + 5, input_box.y + 5))
             self.inputbox.draw(self.screen)
 
@@ -458,147 +501,212 @@ class Game:
 
         self.main_menu()
 
+    # Zapis przebiegu poziomu (do weryfikacji wyniku i odtworzenia) - przy każdym końcu poziomu: wygranej,
+    # wyjściu do menu, restarcie i zamknięciu gry; zwraca ścieżkę powtórki albo None
+    def save_replay(self, user_name=""):
+        if self.simulation is None or self.playback is not None or self.replay_saved:
+            return None
+        self.replay_saved = True
+        try:
+            return save_run(Replay.from_simulation(self.simulation, self.current_level, user_name), self.replay_dir)
+        except OSError as e:
+            print(f"Nie udało się zapisać powtórki: {e}")
+            return None
+
+    # Jeden krok symulacji: gracz, kamera i chmury
+    def update_tick(self, level):
+        # Wejście z powtórki dla tego kroku
+        if self.playback is not None:
+            self.playback.feed(self.simulation)
+        # Update gracza (pozycja, animacja itd.)
+        self.simulation.step()
+
+        # Przesuwanie "kamery" za graczem
+        self.prev_scroll[0], self.prev_scroll[1] = self.scroll
+        self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
+        self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
+
+        # Chmury
+        if self.clouds is not None:
+            self.clouds.update()
+
+    # Ekran ładowania z paskiem postępu (wywoływany przy wczytywaniu tekstur, najwyżej ~60 razy na sekundę)
+    def draw_loading(self, done, total):
+        now = pygame.time.get_ticks()
+        if done < total and now - self.loading_drawn < 16:
+            return
+        self.loading_drawn = now
+        pygame.event.pump()
+        color = (150, 40, 20)
+        self.screen.blit(self.background_menu, (0, 0))
+        text = render_text("Loading...", color, "data/fonts/font1.ttf", 40)
+        self.screen.blit(text, text.get_rect(center=(RES_WIDTH / 2, RES_HEIGHT / 2)))
+        bar = pygame.Rect(RES_WIDTH * 0.3, RES_HEIGHT * 0.6, RES_WIDTH * 0.4, 40)
+        pygame.draw.rect(self.screen, color, bar, 4)
+        fill = bar.inflate(-16, -16)
+        fill.w = int(fill.w * done / total)
+        pygame.draw.rect(self.screen, color, fill)
+        pygame.display.update()
+
+    # Duch najlepszego zapisanego przebiegu poziomu (liczony przy wczytaniu poziomu, nie w czasie gry)
+    def load_ghost(self, level):
+        best = best_replay(level, self.replay_dir) if self.ghost_enabled else None
+        if best is None:
+            self.ghost = None
+            self.ghost_path = None
+        elif best[0] != self.ghost_path:
+            animations = {action: self.assets["player/" + action] for action in PLAYER_ANIMATIONS}
+            self.ghost = Ghost(best[1], self.tilemap, animations)
+            self.ghost_path = best[0]
+
+    # Odtworzenie zapisanego przebiegu tą samą pętlą gry
+    def play_replay(self, path):
+        replay = Replay.load(path)
+        # Nazwa poziomu z pliku trafia do ścieżki mapy - tylko poziomy gry
+        if replay.level not in LEVELS:
+            print("Nieznany poziom w powtórce:", repr(replay.level))
+            return
+        if replay.crc != map_crc(level_path(replay.level)):
+            print("Uwaga: mapa zmieniła się od nagrania powtórki")
+        if replay.build != BUILD:
+            print("Uwaga: powtórka nagrana w innej wersji gry:", replay.build)
+        self.playback = replay
+        self.player_startpos = replay.start_pos
+        self.current_level = replay.level
+        self.run(replay.level)
+
     # Metoda do uruchomienia gry
     def run(self, level=None):
         # Sprawdza jaki level załadować
         gamePaused = False
         pygame.mouse.set_visible(False)
-        # Wymiary przycisków jako % ekranu
-        banner_w = RES_WIDTH * 0.3
-        banner_h = RES_HEIGHT * 0.075
-        button_w = RES_WIDTH * 0.2
-        button_h = RES_HEIGHT * 0.06
-        x_center = RES_WIDTH / 4 - button_w / 2
-
-        # Skalowanie rozmiaru czcionki proporcjonalnie do wysokości ekranu
-        font_size = int(RES_HEIGHT * 0.025)
-        banner_font_size = int(RES_HEIGHT * 0.035)
-
-        # Pozycje przycisków (pionowo)
-        spacing = RES_HEIGHT * 0.075
-        y_start = RES_HEIGHT * 0.075
-        self.resume_button = Button('Resume', x_center, y_start + spacing * 1, button_w, button_h,
-                                    "data/images/banner_scroll_wide_thin.png", font_size=font_size, highlight=True)
-        self.restart_button = Button('Restart', x_center, y_start + spacing * 2, button_w, button_h,
-                                      "data/images/banner_scroll_wide_thin.png", font_size=font_size, highlight=True)
-        self.menu_button = Button('Main menu', x_center, y_start + spacing * 3, button_w, button_h,
-                                     "data/images/banner_scroll_wide_thin.png", font_size=font_size - 2, highlight=True)
-        self.quit_button = Button('Quit', x_center, y_start + spacing * 4, button_w, button_h,
-                                  "data/images/banner_scroll_wide_thin.png", font_size=font_size, highlight=True)
-        # Przycisk PAUSED jako banner (bez akcji, tylko wizualnie)
-        self.paused_banner = Button('PAUSED', RES_WIDTH / 4 - banner_w / 2, RES_HEIGHT * 0.0375, banner_w, banner_h,
-                                    "data/images/banner_scroll_wide_thin.png", font_size=banner_font_size,
-                                    highlight=False)
+        # Przyciski menu pauzy (tworzone raz)
+        screen = self.screens["pause"]
+        self.resume_button = screen["resume"]
+        self.restart_button = screen["restart"]
+        self.menu_button = screen["menu"]
+        self.quit_button = screen["quit"]
+        self.paused_banner = screen["paused"]
 
         if level is not None:
+            # Ranking poziomu (otwarcie bazy, migracja, najlepsze wyniki) wczytywany w tle na czas gry
+            self.leaderboard.prefetch(level)
             self.tilemap.load("data/map/" + str(level) + ".json")
-            self.start_time = pygame.time.get_ticks()
+            # Tekstury tego poziomu (poprzedni poziom zwalnia swoje)
+            if level != self.assets.level:
+                self.backgrounds.clear()
+            self.loading = True
+            self.assets.enter_level(level, self.tilemap, self.draw_loading)
+            self.load_ghost(level)
+            self.loading = False
+            # Stworzenie chmur z użyciem klasy z pliku clouds (obrazki wczytane w enter_level)
+            self.clouds = Clouds(self.assets["clouds"], count=16) if level in CLOUD_LEVELS else None
+            # Stworzenie "gracza" używając klasy z pliku entities, podając pozycję startową i wielkość postaci
+            self.player = Player(self, self.player_startpos, (16, 28))
+            # Symulacja od początku poziomu (z liczby jej kroków liczony jest czas przejścia)
+            self.simulation = Simulation(self.tilemap, self.player)
+            self.replay_saved = False
+            if self.playback is not None:
+                self.playback.position = 0
+        time_str = None
+        # Czas do nadrobienia przez symulację (krok ma stałą długość 1 / TICK_RATE s)
+        accumulator = 0
+        self.clock.tick()
 
         # Główna pętla gry
         while True:
             # Event handler
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.save_replay()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         gamePaused = not gamePaused  # przełączanie pauzy
+                        if self.playback is None:
+                            self.simulation.handle_input(PAUSE, gamePaused)
+
+                    # Przy odtwarzaniu powtórki wejście pochodzi z pliku
+                    if not gamePaused and self.playback is None:
+                        self.simulation.handle_input(KEY_ACTIONS.get(event.key), True)
 
-                    if not gamePaused:
-                        self.player.last_movement = 2
-                        # Jeśli w to skok
-                        if event.key == pygame.K_w:
-                            self.player.jumping = True
-                            jump_start = time.time()
-                            self.player.jump_start_time = time.time()
-                            self.movement = [0, 0]
-                            self.player.jump_time = time.time()
-                        # Only allow left/right movement if not jumping
-                        if not self.player.jumping:
-                            if event.key == pygame.K_a:
-                                self.movement[0] = True
-                            if event.key == pygame.K_d:
-                                self.movement[1] = True
-                        else:
-                            if event.key == pygame.K_a:
-                                self.player.last_movement = 1
-                            if event.key == pygame.K_d:
-                                self.player.last_movement = 0
-
-                elif event.type == pygame.KEYUP and not gamePaused:
-                    if event.key == pygame.K_a:
-                        self.movement[0] = False
-                    if event.key == pygame.K_d:
-                        self.movement[1] = False
-                    if event.key == pygame.K_w:
-                        self.player.jumping = False
-                        jump_duration = time.time() - self.player.jump_start_time
-                        self.player.jump_power = min(jump_duration, self.player.max_jump_power)
-                        self.player.jump(self.player.jump_power)
-                        self.player.reset_jump_power()
+                elif event.type == pygame.KEYUP and not gamePaused and self.playback is None:
+                    self.simulation.handle_input(KEY_ACTIONS.get(event.key), False)
 
                 elif event.type == pygame.MOUSEBUTTONDOWN and gamePaused:
-                    mouse_pos = Button.get_scaled_mouse_pos(self, self.screen, self.display)
+                    mouse_pos = self.output.display_pos(pygame.mouse.get_pos())
                     self.audio.play_sound("data/audio/click.wav")
                     if self.resume_button.is_clicked(mouse_pos=mouse_pos):
                         gamePaused = False
+                        if self.playback is None:
+                            self.simulation.handle_input(PAUSE, gamePaused)
                     elif self.menu_button.is_clicked(mouse_pos=mouse_pos):
+                        self.save_replay()
                         self.main_menu()
                     elif self.restart_button.is_clicked(mouse_pos=mouse_pos):
-                        del self.player
-                        self.player = Player(self, self.player_startpos, (16, 28))
+                        self.save_replay()
+                        # Nowy gracz tworzony w run
                         self.run(level)
                     elif self.quit_button.is_clicked(mouse_pos=mouse_pos):
+                        self.save_replay()
                         pygame.quit()
                         sys.exit()
 
+            # Symulacja w stałych krokach - tyle kroków, ile zmieściło się w czasie od poprzedniej klatki
+            if not gamePaused:
+                while accumulator >= TICK and not self.player.win:
+                    self.update_tick(level)
+                    accumulator -= TICK
+            # Ułamek kroku do interpolacji pozycji przy rysowaniu
+            alpha = accumulator / TICK
+
+            # Timer liczony z kroków symulacji
+            elapsed_ms = self.simulation.elapsed_ms()
+            seconds = elapsed_ms // 1000
+            new_time_str = f"{seconds // 60:02}:{seconds % 60:02}"
+            # Ponowne renderowanie tylko, gdy zmieni się wyświetlana sekunda
+            if new_time_str != time_str:
+                time_str = new_time_str
+                time_text = render_text(time_str, (255, 255, 255), None, 60)
+
             # Sprawdzenie, czy gracz wygrał
-            if self.player.win:
-                self.display_summary(time_str)
+            if self.player.win and self.playback is not None:
+                # Koniec odtwarzania powtórki
+                print("Powtórka zakończona: %s, %d skoków" % (time_str, self.player.total_jumps))
+                self.main_menu()
+            elif self.player.win:
+                self.display_summary(time_str, elapsed_ms)
                 elapsed_time = 0
                 pygame.display.update()
             else:
                 # Tlo dynamiczne
-                self.display.blit(pygame.transform.scale(self.assets[self.current_level],
-                                                         (self.display.get_width(), self.display.get_height())), (0, 0))
+                self.display.blit(self.backgrounds.get(self.current_level, self.display.get_size()), (0, 0))
 
                 if not gamePaused:
-                    # Przesuwanie "kamery" za graczem
-                    self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
-                    self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
-                    render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
+                    # Kamera między poprzednim a obecnym krokiem
+                    render_scroll = (int(self.prev_scroll[0] + (self.scroll[0] - self.prev_scroll[0]) * alpha),
+                                     int(self.prev_scroll[1] + (self.scroll[1] - self.prev_scroll[1]) * alpha))
 
                     # Chmury
-                    if level == "Winter Wilds" or level == "Corrupted Fields":
-                        self.clouds.update()
+                    if self.clouds is not None:
                         self.clouds.render(self.display, offset=render_scroll)
 
                     # Klocki
                     self.tilemap.render(self.display, offset=render_scroll)
 
-                    # Update gracza (pozycja, animacja itd.)
-                    self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+                    # Duch najlepszego przebiegu w tym samym kroku co gracz
+                    if self.ghost is not None:
+                        self.ghost.render(self.display, self.simulation.ticks, offset=render_scroll, alpha=alpha)
 
                     # Render gracza
-                    self.player.render(self.display, offset=render_scroll)
+                    self.player.render(self.display, offset=render_scroll, alpha=alpha)
 
                     self.tilemap.render_offset(self.display, offset=render_scroll)
 
-                    # Timer
-                    elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
-                    minutes = int(elapsed_time / 60)
-                    seconds = int(elapsed_time % 60)
-                    time_str = f"{minutes:02}:{seconds:02}"
-                    time_font = pygame.font.Font(None, 60)
-                    time_text = time_font.render(time_str, True, (255, 255, 255))
-
-                    render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-
                     # Rysowanie paska siły skoku
                     if self.player.jumping:
-                        jump_duration = time.time() - self.player.jump_start_time
-                        temp_power = min(jump_duration, self.player.max_jump_power)
+                        temp_power = self.player.charged_jump_power()
                         filled_width = int(42 * (temp_power / self.player.max_jump_power))
 
                         # Rozmiar paska ładowania (wewnętrzny, kolorowy)
@@ -610,8 +718,9 @@ class Game:
                         border_width, border_height = border_surface.get_size()
 
                         # Oblicz pozycję ramki
-                        border_x = self.player.rect().centerx - render_scroll[0] - border_width // 2
-                        border_y = self.player.rect().top - render_scroll[1] - border_height - 5  # lekko nad graczem
+                        player_pos = self.player.render_pos(alpha)
+                        border_x = int(player_pos[0] + self.player.size[0] / 2) - render_scroll[0] - border_width // 2
+                        border_y = int(player_pos[1]) - render_scroll[1] - border_height - 5  # lekko nad graczem
 
                         # Oblicz pozycję wewnętrznego paska (wycentrowanego w ramce)
                         bar_x = border_x + (border_width - bar_width) // 2
@@ -636,7 +745,7 @@ class Game:
 
                 # Pauza
                 if gamePaused:
-                    mouse_pos = Button.get_scaled_mouse_pos(self, self.screen, self.display)
+                    mouse_pos = self.output.display_pos(pygame.mouse.get_pos())
                     # 4 przyciski menu pauzy
                     # TODO: Naprawić by guziki działały
 
@@ -648,7 +757,7 @@ class Game:
                     self.quit_button.draw(self.display, mouse_pos=mouse_pos)
 
                 # Wyświetlenie wszystkiego na ekran
-                self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
+                self.output.present()
 
                 if gamePaused:
                     mouse_x, mouse_y = pygame.mouse.get_pos()
@@ -657,7 +766,10 @@ class Game:
                 if not gamePaused:
                     self.screen.blit(time_text, (10, 10))
                 pygame.display.update()
-                self.clock.tick(60)  # ograniczenie do 60fps
+            # Ograniczenie do 60fps; wolna klatka nadrabiana jest kolejnymi krokami (najwyżej MAX_FRAME_TIME)
+            frame_time = self.clock.tick(60) / 1000
+            if not gamePaused:
+                accumulator += min(frame_time, MAX_FRAME_TIME)
 
     # Metoda do skalowania obrazu w stylu pixel art bez rozmycia
     def _scale_pixel_art_image(self, image, target_width, target_height):
@@ -686,4 +798,19 @@ class Game:
 
 
 if __name__ == "__main__":
-    Game().main_menu()
\ No newline at end of file
+    # python game.py --replay plik.pjr - odtworzenie powtórki
+    # python game.py --ghost - duch najlepszego przebiegu na poziomie
+    # python game.py --output 1280x720 - rozdzielczość obrazu gry (wyśrodkowanego na ekranie)
+    args = sys.argv[1:]
+    ghost = "--ghost" in args
+    if ghost:
+        args.remove("--ghost")
+    output_size = None
+    if "--output" in args:
+        i = args.index("--output")
+        output_size = parse_size(args[i + 1])
+        del args[i:i + 2]
+    if len(args) > 1 and args[0] == "--replay":
+        Game(ghost, output_size).play_replay(args[1])
+    else:
+        Game(ghost, output_size).main_menu()
\ No newline at end of file
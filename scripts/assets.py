@@ -0,0 +1,145 @@
+from functools import partial
+
+from scripts.atlas import Atlas
+from scripts.utility import load_image, load_images, image_paths, decode_images, Animation, LazyAssets
+
+# Typy klocków (kolejność jak w palecie edytora)
+TILE_TYPES = ["grass", "stone", "Evil-Purple", "Pyramid-Yellow", "Castle-blue", "Diamond-Blue", "Emerald-Green",
+              "grass_purple", "grass_thick_snow", "plain_snow", "ice", "win_tiles"]
+# Animacje gracza: nazwa -> czas klatki
+PLAYER_ANIMATIONS = {"idle": 10, "run": 10, "jump": 4, "fall": 5, "crouch": 4}
+# Katalogi obrazków pakowane do atlasu tekstur
+ATLAS_PATHS = ["tiles/" + tile_type for tile_type in TILE_TYPES] + \
+              ["entities/player/" + action for action in PLAYER_ANIMATIONS]
+# Tła poziomów
+BACKDROPS = {
+    "Winter Wilds": "WWilds.png",
+    "Galactic Tower": "GTower.jpg",
+    "Corrupted Fields": "CFields.png",
+}
+# Zasoby potrzebne na każdym poziomie (pasek ładowania skoku), wczytywane razem z teksturami poziomu
+LEVEL_ASSETS = ["bar_jumping"]
+# Poziomy z chmurami w tle
+CLOUD_LEVELS = ["Winter Wilds", "Corrupted Fields"]
+
+
+# Opis zasobów gry: nazwa -> (rodzaj, ścieżka w data/images, czas klatki animacji)
+# Rodzaj: "image" - jeden obrazek, "images" - katalog obrazków, "animation" - katalog klatek animacji
+def default_specs():
+    specs = {tile_type: ("images", "tiles/" + tile_type, None) for tile_type in TILE_TYPES}
+    specs.update({level: ("image", path, None) for level, path in BACKDROPS.items()})
+    specs.update({
+        "clouds": ("images", "clouds", None),
+        "player": ("image", "player_correct.png", None),
+        "bar_jumping": ("image", "bar_jumping.png", None),
+    })
+    specs.update({"player/" + action: ("animation", "entities/player/" + action, img_dur)
+                  for action, img_dur in PLAYER_ANIMATIONS.items()})
+    return specs
+
+
+# Nazwy zasobów potrzebnych poziomowi: typy klocków z wczytanej mapy, tło poziomu, chmury i LEVEL_ASSETS
+def level_asset_names(tilemap, level=None):
+    names = tilemap.tile_types() | set(LEVEL_ASSETS)
+    if level in BACKDROPS:
+        names.add(level)
+    if level in CLOUD_LEVELS:
+        names.add("clouds")
+    return names
+
+
+# Wspólny rejestr zasobów gry i edytora: wczytuje zasoby przy pierwszym użyciu, a te pobrane
+# przez acquire zwalnia, gdy nikt ich już nie używa. Zasoby z atlasu (klocki, klatki gracza) są widokami
+# na arkusze, które zostają w pamięci, więc nie są liczone ani zwalniane
+class AssetRegistry(LazyAssets):
+    def __init__(self, specs=None, atlas_paths=ATLAS_PATHS):
+        self.specs = default_specs() if specs is None else specs
+        super().__init__({name: partial(self.load_spec, spec) for name, spec in self.specs.items()})
+        # Katalogi brane z atlasu tekstur (atlas wczytywany przy pierwszym użyciu)
+        self.atlas_paths = set(atlas_paths)
+        self.atlas = None
+        # nazwa -> liczba odwołań (tylko zasoby spoza atlasu)
+        self.refs = {}
+        # Zasoby obecnego poziomu
+        self.level = None
+        self.level_names = set()
+
+    # Atlas zbudowany offline (python -m scripts.atlas), a gdy go brakuje lub jest nieaktualny -
+    # spakowany przy starcie
+    def get_atlas(self, progress=None):
+        if self.atlas is None:
+            self.atlas = Atlas.load(self.atlas_paths)
+            if self.atlas is None:
+                paths = []
+                for path in sorted(self.atlas_paths):
+                    paths += image_paths(path)
+                decode_images(paths, progress)
+                self.atlas = Atlas.build(sorted(self.atlas_paths))
+        return self.atlas
+
+    def load_spec(self, spec):
+        kind, path, img_dur = spec
+        if kind == "image":
+            return load_image(path)
+        if path in self.atlas_paths:
+            images = self.get_atlas().images(path)
+        else:
+            images = load_images(path)
+        if kind == "animation":
+            return Animation(images, img_dur=img_dur)
+        return images
+
+    # Ścieżki obrazków, z których składa się zasób (poza atlasem)
+    def spec_paths(self, spec):
+        kind, path, img_dur = spec
+        if kind == "image":
+            return [path]
+        if path in self.atlas_paths:
+            return []
+        return image_paths(path)
+
+    # Wczytanie zasobów z dekodowaniem obrazków w puli wątków; progress(gotowe, wszystkie)
+    def preload(self, names, progress=None):
+        missing = [name for name in names if name not in self]
+        paths = []
+        for name in missing:
+            if self.specs[name][1] in self.atlas_paths:
+                self.get_atlas(progress)
+            paths += self.spec_paths(self.specs[name])
+        decode_images(paths, progress)
+        for name in missing:
+            self[name]
+
+    # Zasoby, które warto zwalniać (spoza atlasu)
+    def _releasable(self, names):
+        return [name for name in names if self.specs[name][1] not in self.atlas_paths]
+
+    # Pobranie (i wczytanie) zasobów; każde acquire wymaga późniejszego release
+    def acquire(self, names, progress=None):
+        for name in self._releasable(names):
+            self.refs[name] = self.refs.get(name, 0) + 1
+        self.preload(names, progress)
+
+    def release(self, names):
+        for name in self._releasable(names):
+            count = self.refs.get(name, 0) - 1
+            if count > 0:
+                self.refs[name] = count
+            else:
+                self.refs.pop(name, None)
+                self.pop(name, None)
+
+    # Przejście na poziom: najpierw pobranie nowych zasobów, potem zwolnienie poprzedniego poziomu,
+    # więc zasoby wspólne dla obu poziomów nie są wczytywane ponownie
+    # (tilemap - już wczytana mapa poziomu)
+    def enter_level(self, level, tilemap, progress=None):
+        names = level_asset_names(tilemap, level)
+        self.acquire(names, progress)
+        self.release(self.level_names)
+        self.level = level
+        self.level_names = names
+
+    def leave_level(self):
+        self.release(self.level_names)
+        self.level = None
+        self.level_names = set()
@@ -0,0 +1,154 @@
+import json
+import os
+import zlib
+
+import pygame
+
+from scripts.utility import BASE_IMG_PATH, load_images
+
+# Katalog z arkuszami atlasu i tablicą prostokątów (względem data/images)
+ATLAS_DIR = "atlas"
+ATLAS_INDEX = "atlas.json"
+# Maksymalny rozmiar jednego arkusza
+MAX_SHEET_SIZE = 1024
+# Odstęp między obrazkami w arkuszu
+PADDING = 1
+
+
+# Pakowanie prostokątów w półki (od najwyższych); zwraca pozycje (arkusz, x, y) w kolejności sizes
+# i rozmiary arkuszy
+def pack(sizes, max_size=MAX_SHEET_SIZE, padding=PADDING):
+    positions = [None] * len(sizes)
+    sheets = []
+    x = y = shelf_height = 0
+    width = height = 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[i]
+        if w > max_size or h > max_size:
+            raise ValueError("Obrazek %dx%d nie mieści się w arkuszu" % (w, h))
+        if x + w > max_size:
+            # Nowa półka
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        if y + h > max_size:
+            # Nowy arkusz
+            sheets.append((width, height))
+            x = y = shelf_height = 0
+            width = height = 0
+        positions[i] = (len(sheets), x, y)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+        width = max(width, x - padding)
+        height = max(height, y + h)
+    sheets.append((width, height))
+    return positions, sheets
+
+
+# Opis plików źródłowych zapisywany przy budowaniu atlasu: nazwa, rozmiar, czas modyfikacji (ns)
+# i crc32 zawartości
+def signature(paths):
+    files = {}
+    for path in paths:
+        files[path] = []
+        for name in sorted(os.listdir(BASE_IMG_PATH + path)):
+            stat = os.stat(BASE_IMG_PATH + path + "/" + name)
+            files[path].append([name, stat.st_size, stat.st_mtime_ns, _file_crc(BASE_IMG_PATH + path + "/" + name)])
+    return files
+
+
+# Czy pliki źródłowe nadal pasują do signature bez dekodowania obrazków: nazwy i rozmiary z katalogów,
+# a zawartość (crc32) czytana tylko dla plików o innym czasie modyfikacji (np. po checkoucie),
+# tak jak w mapformat.load_binary
+def is_current(saved):
+    for path, files in saved.items():
+        if sorted(os.listdir(BASE_IMG_PATH + path)) != [file[0] for file in files]:
+            return False
+        for name, size, mtime, crc in files:
+            stat = os.stat(BASE_IMG_PATH + path + "/" + name)
+            if stat.st_size != size:
+                return False
+            if stat.st_mtime_ns != mtime and _file_crc(BASE_IMG_PATH + path + "/" + name) != crc:
+                return False
+    return True
+
+
+def _file_crc(path):
+    f = open(path, "rb")
+    crc = zlib.crc32(f.read())
+    f.close()
+    return crc
+
+
+# Atlas tekstur: kilka dużych arkuszy i tablica prostokątów dla każdego katalogu obrazków
+class Atlas:
+    def __init__(self, sheets, rects):
+        self.sheets = sheets
+        # katalog -> lista (arkusz, x, y, w, h) w kolejności load_images
+        self.rects = rects
+
+    def __contains__(self, path):
+        return path in self.rects
+
+    # Obrazki katalogu jako widoki (subsurface) na arkusze atlasu
+    def images(self, path):
+        return [self.sheets[sheet].subsurface((x, y, w, h)) for sheet, x, y, w, h in self.rects[path]]
+
+    # Spakowanie obrazków z podanych katalogów
+    @classmethod
+    def build(cls, paths):
+        images = [(path, img) for path in paths for img in load_images(path)]
+        positions, sizes = pack([img.get_size() for path, img in images])
+        sheets = [pygame.Surface(size, pygame.SRCALPHA) for size in sizes]
+        rects = {path: [] for path in paths}
+        for (path, img), (sheet, x, y) in zip(images, positions):
+            # BLEND_RGBA_MAX na przezroczystym arkuszu kopiuje piksele razem z kanałem alfa
+            sheets[sheet].blit(img, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+            rects[path].append((sheet, x, y) + img.get_size())
+        if pygame.display.get_surface() is not None:
+            sheets = [sheet.convert_alpha() for sheet in sheets]
+        return cls(sheets, rects)
+
+    # Wczytanie atlasu zapisanego przez save; None, jeśli go nie ma albo nie pasuje do plików źródłowych
+    @classmethod
+    def load(cls, paths, directory=BASE_IMG_PATH + ATLAS_DIR):
+        try:
+            f = open(os.path.join(directory, ATLAS_INDEX), "r")
+            index = json.load(f)
+            f.close()
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            if any(path not in index["rects"] for path in paths) or not is_current(index["signature"]):
+                return None
+        except (FileNotFoundError, ValueError):
+            # Brak plików albo signature w starszym układzie
+            return None
+        sheets = []
+        for name in index["sheets"]:
+            sheet = pygame.image.load(os.path.join(directory, name))
+            sheets.append(sheet.convert_alpha() if pygame.display.get_surface() is not None else sheet)
+        return cls(sheets, {path: [tuple(rect) for rect in rects] for path, rects in index["rects"].items()})
+
+    def save(self, directory=BASE_IMG_PATH + ATLAS_DIR):
+        os.makedirs(directory, exist_ok=True)
+        names = []
+        for i, sheet in enumerate(self.sheets):
+            names.append("sheet_%d.png" % i)
+            pygame.image.save(sheet, os.path.join(directory, names[-1]))
+        f = open(os.path.join(directory, ATLAS_INDEX), "w")
+        json.dump({"sheets": names, "rects": self.rects, "signature": signature(self.rects)}, f)
+        f.close()
+
+
+# Budowanie atlasu offline (klocki i klatki gracza):
+#   python -m scripts.atlas
+if __name__ == "__main__":
+    from scripts.assets import ATLAS_PATHS
+
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    atlas = Atlas.build(ATLAS_PATHS)
+    atlas.save()
+    print(sum(len(rects) for rects in atlas.rects.values()), "obrazków ->",
+          ", ".join("%dx%d" % sheet.get_size() for sheet in atlas.sheets))
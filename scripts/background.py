@@ -0,0 +1,30 @@
+from collections import OrderedDict
+
+import pygame
+
+
+# Pamięć podręczna przeskalowanych teł poziomów, kluczowana (poziom, rozmiar)
+class Backgrounds:
+    def __init__(self, game, max_entries=4):
+        self.game = game
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+
+    # Tło poziomu w danym rozmiarze, skalowane tylko raz
+    def get(self, level, size):
+        key = (level, (int(size[0]), int(size[1])))
+        background = self.cache.get(key)
+        if background is None:
+            background = pygame.transform.scale(self.game.assets[level], key[1])
+            # Tła są nieprzezroczyste, więc konwersja do formatu ekranu bez kanału alfa
+            if pygame.display.get_surface() is not None:
+                background = background.convert()
+            self.cache[key] = background
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(key)
+        return background
+
+    def clear(self):
+        self.cache.clear()
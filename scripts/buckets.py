@@ -0,0 +1,44 @@
+import pygame
+
+
+# Kubełkowa struktura przestrzenna dla obiektów o dowolnej pozycji (np. klocków poza gridem)
+class SpatialBuckets:
+    def __init__(self, bucket_size=128):
+        self.bucket_size = bucket_size
+        # (bx, by) -> lista (numer, obiekt)
+        self.buckets = {}
+        # id(obiekt) -> (numer, obiekt, prostokąt)
+        self.entries = {}
+        self.next_seq = 0
+
+    def _keys(self, rect):
+        for bx in range(rect.left // self.bucket_size, (rect.right - 1) // self.bucket_size + 1):
+            for by in range(rect.top // self.bucket_size, (rect.bottom - 1) // self.bucket_size + 1):
+                yield bx, by
+
+    def insert(self, item, rect):
+        entry = (self.next_seq, item)
+        self.next_seq += 1
+        self.entries[id(item)] = (entry[0], item, rect)
+        for key in self._keys(rect):
+            self.buckets.setdefault(key, []).append(entry)
+
+    def remove(self, item):
+        seq, item, rect = self.entries.pop(id(item))
+        for key in self._keys(rect):
+            bucket = self.buckets[key]
+            bucket.remove((seq, item))
+            if not bucket:
+                del self.buckets[key]
+
+    # Obiekty nachodzące na prostokąt, w kolejności dodania
+    def query(self, rect):
+        found = {}
+        for key in self._keys(rect):
+            for seq, item in self.buckets.get(key, ()):
+                if seq not in found and self.entries[id(item)][2].colliderect(rect):
+                    found[seq] = item
+        return [found[seq] for seq in sorted(found)]
+
+    def query_point(self, point):
+        return self.query(pygame.Rect(int(point[0]), int(point[1]), 1, 1))
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+import pygame
+
+CHUNK_SIZE = 256
+
+
+# Pamięć podręczna prerenderowanych fragmentów (chunków) mapy klocków
+class ChunkCache:
+    def __init__(self, tilemap, chunk_size=CHUNK_SIZE, max_chunks=64):
+        self.tilemap = tilemap
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        # (cx, cy) -> Surface, w kolejności ostatniego użycia (LRU)
+        self.chunks = OrderedDict()
+        self.margin = None
+
+    def clear(self):
+        self.chunks.clear()
+        self.margin = None
+
+    # Ile klocków w lewo/górę trzeba sprawdzić, bo większe obrazki wystają poza swoją komórkę
+    def _get_margin(self):
+        if self.margin is None:
+            tile_size = self.tilemap.tile_size
+            types = self.tilemap.tilemap.tile_types()
+            self.margin = 0
+            for tile_type in types:
+                for img in self.tilemap.game.assets[tile_type]:
+                    self.margin = max(self.margin, -(-img.get_width() // tile_size) - 1,
+                                      -(-img.get_height() // tile_size) - 1)
+        return self.margin
+
+    # Unieważnienie chunków, na które może zachodzić klocek na danej pozycji
+    def invalidate(self, pos):
+        if self.margin is None:
+            return
+        tile_size = self.tilemap.tile_size
+        tile = self.tilemap.tile_at(pos)
+        if tile is not None:
+            img = self.tilemap.game.assets[tile[0]][tile[1]]
+            if max(img.get_width(), img.get_height()) > (self.margin + 1) * tile_size:
+                # Nowy klocek wystaje dalej niż dotychczasowy margines - przebuduj wszystko
+                self.clear()
+                return
+        reach = (self.margin + 1) * tile_size - 1
+        x, y = pos[0] * tile_size, pos[1] * tile_size
+        for cx in range(x // self.chunk_size, (x + reach) // self.chunk_size + 1):
+            for cy in range(y // self.chunk_size, (y + reach) // self.chunk_size + 1):
+                self.chunks.pop((cx, cy), None)
+
+    def _build(self, key):
+        tile_size = self.tilemap.tile_size
+        grid = self.tilemap.tilemap
+        assets = self.tilemap.game.assets
+        margin = self._get_margin()
+        origin = (key[0] * self.chunk_size, key[1] * self.chunk_size)
+        chunk = pygame.Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA)
+        # Ta sama kolejność co przy renderowaniu klocek po klocku (najpierw x, potem y)
+        for x in range(origin[0] // tile_size - margin, (origin[0] + self.chunk_size) // tile_size):
+            for y in range(origin[1] // tile_size - margin, (origin[1] + self.chunk_size) // tile_size):
+                tile = grid.get(x, y)
+                if tile is not None:
+                    chunk.blit(assets[tile[0]][tile[1]], (x * tile_size - origin[0], y * tile_size - origin[1]))
+        if pygame.display.get_surface() is not None:
+            chunk = chunk.convert_alpha()
+        # Kodowanie RLE - puste obszary chunka są pomijane przy blitowaniu
+        chunk.set_alpha(255, pygame.RLEACCEL)
+        return chunk
+
+    def get(self, key):
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self._build(key)
+            self.chunks[key] = chunk
+            # Usuwanie najdawniej używanych chunków
+            while len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        return chunk
+
+    def render(self, surf, offset=(0, 0)):
+        for cx in range(offset[0] // self.chunk_size, (offset[0] + surf.get_width()) // self.chunk_size + 1):
+            for cy in range(offset[1] // self.chunk_size, (offset[1] + surf.get_height()) // self.chunk_size + 1):
+                surf.blit(self.get((cx, cy)), (cx * self.chunk_size - offset[0], cy * self.chunk_size - offset[1]))
@@ -1,7 +1,9 @@
-import time
 import pygame
 from scripts.audio import Audio
 
+# Liczba kroków symulacji na sekundę (fizyka liczona jest w krokach, niezależnie od liczby klatek)
+TICK_RATE = 60
+
 # Klasa do stworzenia entity
 class PhysicsEntity:
     def __init__(self, game, e_type, pos, size):
@@ -9,6 +11,8 @@ class PhysicsEntity:
         self.game = game
         self.type = e_type
         self.pos = list(pos)
+        # Pozycja z poprzedniego kroku do interpolacji przy rysowaniu
+        self.prev_pos = list(pos)
         self.size = size
         self.velocity = [0, 0]
         self.collisions = {"up": False, "down": False, "right": False, "left": False}
@@ -33,42 +37,27 @@ class PhysicsEntity:
             return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
 
     # Metoda sprawdzająca i ustawiająca akcje gracza (skok, bieg, idle, kucanie)
+    # Bez gry (symulacja bez okna) animacje nie są wczytywane
     def set_action(self, action):
         if action != self.action:
             self.action = action
-            self.animation = self.game.assets[self.type + "/" + self.action].copy()
+            if self.game is not None:
+                self.animation = self.game.assets[self.type + "/" + self.action].copy()
 
     # Metoda update'ująca gracza
     def update(self, tilemap, movement=(0, 0)):
+        self.prev_pos[0] = self.pos[0]
+        self.prev_pos[1] = self.pos[1]
         self.collisions = {"up": False, "down": False, "right": False, "left": False}
         # Separate axis movement to prevent tunneling through walls
 
         # --- X axis movement and collision ---
         self.pos[0] += movement[0] + self.velocity[0]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects(self.pos):
-            if entity_rect.colliderect(rect[0]):
-                if movement[0] + self.velocity[0] > 0:
-                    entity_rect.right = rect[0].left
-                    self.collisions["right"] = True
-                if movement[0] + self.velocity[0] < 0:
-                    entity_rect.left = rect[0].right
-                    self.collisions["left"] = True
-                self.pos[0] = entity_rect.x
+        self.collide_x(tilemap, movement)
 
         # --- Y axis movement and collision ---
         self.pos[1] += movement[1] + self.velocity[1]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects(self.pos):
-            if entity_rect.colliderect(rect[0]):
-                if movement[1] + self.velocity[1] > 0:
-                    entity_rect.bottom = rect[0].top
-                    self.collide_type_bottom = rect[1]
-                    self.collisions["down"] = True
-                if movement[1] + self.velocity[1] < 0:
-                    entity_rect.top = rect[0].bottom
-                    self.collisions["up"] = True
-                self.pos[1] = entity_rect.y
+        self.collide_y(tilemap, movement)
 
         # Flip sprite
         if movement[0] > 0:
@@ -80,12 +69,44 @@ class PhysicsEntity:
         self.velocity[1] = min(5, self.velocity[1] + 0.1)
         if self.collisions["down"] or self.collisions["up"]:
             self.velocity[1] = 0
-        self.animation.update()
+        if self.animation is not None:
+            self.animation.update()
+
+    # Kolizje w osi x z kolejnymi klockami nachodzącymi na hitbox
+    def collide_x(self, tilemap, movement):
+        entity_rect = self.rect()
+        for rect in tilemap.collisions(entity_rect):
+            if movement[0] + self.velocity[0] > 0:
+                entity_rect.right = rect[0].left
+                self.collisions["right"] = True
+            if movement[0] + self.velocity[0] < 0:
+                entity_rect.left = rect[0].right
+                self.collisions["left"] = True
+            self.pos[0] = entity_rect.x
+
+    # Kolizje w osi y, jak collide_x
+    def collide_y(self, tilemap, movement):
+        entity_rect = self.rect()
+        for rect in tilemap.collisions(entity_rect):
+            if movement[1] + self.velocity[1] > 0:
+                entity_rect.bottom = rect[0].top
+                self.collide_type_bottom = rect[1]
+                self.collisions["down"] = True
+            if movement[1] + self.velocity[1] < 0:
+                entity_rect.top = rect[0].bottom
+                self.collisions["up"] = True
+            self.pos[1] = entity_rect.y
+
+    # Pozycja do rysowania między poprzednim a obecnym krokiem (alpha od 0 do 1)
+    def render_pos(self, alpha=1.0):
+        return (self.prev_pos[0] + (self.pos[0] - self.prev_pos[0]) * alpha,
+                self.prev_pos[1] + (self.pos[1] - self.prev_pos[1]) * alpha)
 
     # Renderowanie gracza
-    def render(self, surf, offset=(0, 0)):
-        surf.blit(pygame.transform.flip(self.animation.img(), self.flip, False),
-                  (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
+    def render(self, surf, offset=(0, 0), alpha=1.0):
+        pos = self.render_pos(alpha)
+        surf.blit(self.animation.img(self.flip),
+                  (pos[0] - offset[0] + self.anim_offset[0], pos[1] - offset[1] + self.anim_offset[1]))
 
 
 # Klasa dedykowana dla gracza
@@ -97,7 +118,8 @@ class Player(PhysicsEntity):
         self.air_time = 0
         self.bounce = False
         self.jumps = 1
-        self.jump_time = 0
+        # Liczba kroków od ostatniego wciśnięcia skoku
+        self.jump_ticks = 0
         self.win = False
         self.total_jumps = 0
         self.jump_power = 0  # Dodaj atrybut do przechowywania siły skoku
@@ -105,19 +127,27 @@ class Player(PhysicsEntity):
         self.footstep_index = 0
         self.footstep_timer = 0
         self.footstep_interval = 16 # np. liczba klatek między dźwiękami
-        self.audio = Audio(self)
-        self.footstep_sounds = [
-            self.audio.load_sound("data/audio/run_1.wav"),
-            self.audio.load_sound("data/audio/run_2.wav"),
-            self.audio.load_sound("data/audio/run_3.wav"),
-            self.audio.load_sound("data/audio/run_4.wav"),
-            self.audio.load_sound("data/audio/run_5.wav"),
-            self.audio.load_sound("data/audio/run_6.wav")
-        ]
+        # Dźwięki tylko w grze (symulacja bez okna nie używa miksera)
+        self.audio = None
+        self.footstep_sounds = []
+        if game is not None:
+            self.audio = Audio(self)
+            self.footstep_sounds = [
+                self.audio.load_sound("data/audio/run_1.wav"),
+                self.audio.load_sound("data/audio/run_2.wav"),
+                self.audio.load_sound("data/audio/run_3.wav"),
+                self.audio.load_sound("data/audio/run_4.wav"),
+                self.audio.load_sound("data/audio/run_5.wav"),
+                self.audio.load_sound("data/audio/run_6.wav")
+            ]
 
     def reset_jump_power(self):
         self.jump_power = 0
 
+    # Siła skoku z liczby kroków trzymania W (w sekundach, jak wcześniej przy pomiarze czasu)
+    def charged_jump_power(self):
+        return min(self.jump_ticks / TICK_RATE, self.max_jump_power)
+
     # Metoda do update'tu gracza
     def update(self, tilemap, movement=(0, 0)):
         # Blokada ruchu poziomego na śniegu
@@ -181,26 +211,31 @@ class Player(PhysicsEntity):
         if self.action == "run":
             self.footstep_timer += 1
             if self.footstep_timer >= self.footstep_interval and self.air_time == 0:
-                self.audio.play_sound(self.footstep_sounds[self.footstep_index % len(self.footstep_sounds)], volume=0.2)
+                if self.audio is not None:
+                    self.audio.play_sound(self.footstep_sounds[self.footstep_index % len(self.footstep_sounds)],
+                                          volume=0.2)
                 self.footstep_index += 1
                 self.footstep_timer = 0
 
 
 
-        # Sprawdzanie jak długo gracz trzyma W i gdy czas dotrze do max automatycznie skacze
+        # Sprawdzanie jak długo (ile kroków od wciśnięcia) gracz trzyma W i gdy czas dotrze do max
+        # automatycznie skacze
         if self.jumping:
-            t_now = time.time()
-            if t_now - self.jump_time >= self.max_jump_power:
+            if self.jump_ticks / TICK_RATE >= self.max_jump_power:
                 self.jump(self.max_jump_power)
             if self.last_movement == 0:
                 self.flip = False
             if self.last_movement == 1:
                 self.flip = True
+        # Kroki liczone od wciśnięcia W, także gdy skok już się odbył (jak czas od wciśnięcia)
+        self.jump_ticks += 1
 
     # Metoda do skoku
     def jump(self, power):
         if self.jumps == 1:
-            self.audio.play_sound("data/audio/jump.wav", volume=0.5)
+            if self.audio is not None:
+                self.audio.play_sound("data/audio/jump.wav", volume=0.5)
             self.velocity[1] = -4.5 * power
             if self.last_movement == 0:
                 self.velocity[0] = 2
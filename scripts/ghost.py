@@ -0,0 +1,73 @@
+from array import array
+
+from scripts.assets import PLAYER_ANIMATIONS
+from scripts.entities import Player
+from scripts.simulation import Simulation, PLAYER_SIZE
+
+# Przezroczystość ducha (0 - niewidoczny, 255 - jak gracz)
+GHOST_ALPHA = 110
+# Przesunięcie obrazka gracza względem hitboxu: zwykłe i przy kucaniu
+ANIM_OFFSET = (-3, -3)
+CROUCH_OFFSET = (-3, 7)
+
+
+# Duch najlepszego przebiegu: pozycje i klatki gracza z powtórki policzone raz przy wczytaniu poziomu,
+# w czasie gry tylko odczytywane z tablic (jeden blit na klatkę)
+class Ghost:
+    # animations: akcja gracza -> Animation (klatki z rejestru zasobów)
+    def __init__(self, replay, tilemap, animations):
+        # Półprzezroczyste klatki: (obrazek, przesunięcie x, przesunięcie y)
+        self.frames = []
+        # (akcja, numer obrazka) -> numer pierwszej z 4 klatek ducha (odbicie, przesunięcie przy kucaniu)
+        first_frame = {}
+        for action in PLAYER_ANIMATIONS:
+            animation = animations[action]
+            for i in range(len(animation.images)):
+                first_frame[action, i] = len(self.frames)
+                for flip in (False, True):
+                    img = (animation.flipped_images if flip else animation.images)[i].copy()
+                    img.set_alpha(GHOST_ALPHA)
+                    self.frames.append((img,) + ANIM_OFFSET)
+                    self.frames.append((img,) + CROUCH_OFFSET)
+        # Po każdym kroku (indeks 0 - start): x, y gracza i numer klatki ducha
+        self.positions = array("f")
+        self.poses = bytearray()
+
+        simulation = Simulation(tilemap, Player(None, replay.start_pos, PLAYER_SIZE))
+        player = simulation.player
+        # Licznik klatek animacji tak jak w Animation (nowa akcja zaczyna animację od początku)
+        frame = 0
+        # Przesunięcie obrazka zależy od akcji z poprzedniego kroku (Player.update ustawia je przed akcją)
+        crouch = False
+        replay.position = 0
+        while True:
+            action = player.action
+            animation = animations[action]
+            self.positions.extend(player.pos)
+            self.poses.append(first_frame[action, frame // animation.img_duration] + player.flip * 2 + crouch)
+            if simulation.ticks >= replay.ticks or player.win:
+                break
+            replay.feed(simulation)
+            crouch = player.action == "crouch"
+            simulation.step()
+            if player.action != action:
+                frame = 0
+            else:
+                frame = (frame + 1) % (animation.img_duration * len(animation.images))
+        replay.position = 0
+
+    # Liczba kroków przebiegu ducha
+    def __len__(self):
+        return len(self.poses) - 1
+
+    # Rysowanie ducha w kroku tick gry, między poprzednim a obecnym krokiem (jak gracz);
+    # po końcu przebiegu duch zostaje na mecie
+    def render(self, surf, tick, offset=(0, 0), alpha=1.0):
+        last = len(self.poses) - 1
+        i = min(tick, last)
+        j = i - 1 if 0 < tick <= last else i
+        positions = self.positions
+        x = positions[2 * j] + (positions[2 * i] - positions[2 * j]) * alpha
+        y = positions[2 * j + 1] + (positions[2 * i + 1] - positions[2 * j + 1]) * alpha
+        img, offset_x, offset_y = self.frames[self.poses[i]]
+        surf.blit(img, (x - offset[0] + offset_x, y - offset[1] + offset_y))
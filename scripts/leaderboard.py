@@ -0,0 +1,169 @@
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+
+from scripts.ranking import format_time, open_store
+
+# Znacznik końca pracy wątku zapisującego
+_STOP = object()
+
+
+# Zapytanie o najlepsze wyniki na mapie obsługiwane przez wątek zapisujący
+class _Query:
+    def __init__(self, level, n):
+        self.level = level
+        self.n = n
+        self.future = Future()
+
+
+# Zapis wyników w osobnym wątku: ograniczona kolejka, zapisy łączone w paczki, opróżniana przy wyjściu.
+# Ten sam wątek odpowiada na zapytania o ranking - otwarcie bazy i migracja nie blokują gry
+class ResultWriter:
+    def __init__(self, store_factory, max_pending=256, batch_size=64):
+        self.store_factory = store_factory
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self._run, name="ResultWriter", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    # Dodanie wyniku (nazwa, czas w ms, skoki, mapa, ścieżka powtórki) do zapisu; blokuje tylko przy pełnej kolejce
+    def submit(self, result):
+        self.queue.put(result)
+
+    # Najlepsze wyniki na mapie (po zapisaniu wszystkich wcześniej dodanych) jako Future z listą
+    # (nazwa, czas w ms, skoki)
+    def query(self, level, n):
+        item = _Query(level, n)
+        self.queue.put(item)
+        return item.future
+
+    def _run(self):
+        # Magazyn tworzony w wątku zapisującym (połączenie SQLite nie może przechodzić między wątkami)
+        try:
+            store = self.store_factory()
+        except Exception as e:
+            print(f"Nie udało się otworzyć rankingu: {e}")
+            store = None
+            error = e
+        running = True
+        while running:
+            item = self.queue.get()
+            received = 1
+            batch = []
+            query = None
+            while True:
+                if item is _STOP:
+                    running = False
+                    break
+                # Zapytanie kończy paczkę - widzi wszystkie wyniki dodane przed nim
+                if isinstance(item, _Query):
+                    query = item
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                    received += 1
+                except queue.Empty:
+                    break
+            if batch and store is not None:
+                try:
+                    store.add_many(batch)
+                except Exception as e:
+                    print(f"Nie udało się zapisać wyników: {e}")
+            if query is not None:
+                try:
+                    if store is None:
+                        raise error
+                    query.future.set_result(list(store.top(query.level, query.n)))
+                except Exception as e:
+                    query.future.set_exception(e)
+            for i in range(received):
+                self.queue.task_done()
+        if store is not None:
+            store.close()
+
+    # Poczekanie, aż wszystkie dotychczasowe wyniki zostaną zapisane
+    def flush(self):
+        self.queue.join()
+
+    # Zapisanie zaległych wyników i zatrzymanie wątku
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+
+
+# Ranking trzymany w pamięci - magazyn wyników jest pytany raz na mapę, a nowe wyniki od razu trafiają
+# do pamięci. Odczyt i zapis na dysk odbywają się w wątku zapisującym
+class Leaderboard:
+    def __init__(self, store_factory=open_store, top_n=3):
+        # Wątek zapisujący (razem z magazynem) uruchamiany dopiero przy pierwszym użyciu
+        self.store_factory = store_factory
+        self.writer = None
+        self.top_n = top_n
+        # mapa -> najlepsze wyniki (nazwa, czas w ms, skoki)
+        self.results = {}
+        # mapa -> zapytanie o najlepsze wyniki wysłane do wątku zapisującego, jeszcze nieodebrane
+        self.pending = {}
+        # mapa -> gotowe do wyświetlenia napisy najlepszych wyników
+        self.rows = {}
+
+    def _writer(self):
+        if self.writer is None:
+            self.writer = ResultWriter(self.store_factory)
+        return self.writer
+
+    # Wczytanie najlepszych wyników w tle (np. przy starcie poziomu), żeby ekran podsumowania na nie nie czekał
+    def prefetch(self, current_map):
+        if current_map not in self.results and current_map not in self.pending:
+            self.pending[current_map] = self._writer().query(current_map, self.top_n)
+
+    def _results(self, current_map):
+        results = self.results.get(current_map)
+        if results is None:
+            self.prefetch(current_map)
+            results = self.pending.pop(current_map).result()
+            self.results[current_map] = results
+        return results
+
+    # Napisy z najlepszymi wynikami na mapie, np. "1. ('Gracz', '00:42', 7)"
+    def top(self, current_map):
+        rows = self.rows.get(current_map)
+        if rows is None:
+            rows = [f"{i + 1}. {(user_name, format_time(time_ms), total_jumps)}"
+                    for i, (user_name, time_ms, total_jumps) in enumerate(self._results(current_map))]
+            self.rows[current_map] = rows
+        return rows
+
+    # Dodanie wyniku (czas w ms, replay - ścieżka powtórki przebiegu): od razu widoczny w rankingu,
+    # zapisywany w tle
+    def save(self, user_name, time_ms, total_jumps, current_map, replay=None):
+        results = self._results(current_map)
+        self._writer().submit((user_name, time_ms, total_jumps, current_map, replay))
+        results.append((user_name, time_ms, total_jumps))
+        # Stabilne sortowanie - przy równym czasie wcześniejszy wynik zostaje wyżej, jak w bazie
+        results.sort(key=lambda x: x[1])
+        del results[self.top_n:]
+        self.rows.pop(current_map, None)
+
+    # Wymuszenie ponownego odczytu z magazynu (po zapisaniu zaległych wyników)
+    def invalidate(self, current_map=None):
+        if self.writer is not None:
+            self.writer.flush()
+        if current_map is None:
+            self.results.clear()
+            self.pending.clear()
+            self.rows.clear()
+        else:
+            self.results.pop(current_map, None)
+            self.pending.pop(current_map, None)
+            self.rows.pop(current_map, None)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
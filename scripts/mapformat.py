@@ -0,0 +1,202 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+# Kompaktowy binarny format mapy (.pjm), little-endian:
+#   nagłówek, tabela typów (u8 długość + nazwa utf-8),
+#   klocki w gridzie kolumnami: x int16[], y int16[], typ uint8[], wariant uint8[],
+#   klocki poza gridem: x float64[], y float64[], typ uint8[], wariant uint8[]
+MAGIC = b"PJMP"
+VERSION = 2
+# magic, wersja, tile_size, liczba typów, liczba klocków, liczba klocków poza gridem,
+# rozmiar, crc32 i czas modyfikacji (ns) źródłowego json
+HEADER = struct.Struct("<4sHHHIIIIq")
+BINARY_EXT = ".pjm"
+
+
+# Ścieżka pliku binarnego odpowiadającego mapie json
+def binary_path(path):
+    return os.path.splitext(path)[0] + BINARY_EXT
+
+
+# Powód, dla którego mapy nie da się zapisać w formacie binarnym (None, jeśli się da): współrzędne klocków
+# w gridzie muszą mieścić się w int16, warianty i numery typów w uint8, a nazwy typów w 255 bajtach
+def unsupported(map_data):
+    tiles = list(map_data["tilemap"].values())
+    offgrid = map_data["offgrid"]
+    for tile in tiles:
+        if not all(-0x8000 <= coordinate <= 0x7FFF for coordinate in tile["pos"]):
+            return "klocek poza zakresem int16: %s" % (tile["pos"],)
+    for tile in tiles + offgrid:
+        if not 0 <= tile["variant"] <= 0xFF:
+            return "wariant %s klocka %s poza zakresem uint8" % (tile["variant"], tile["type"])
+    types = {tile["type"] for tile in tiles + offgrid}
+    if len(types) > 0x100:
+        return "%d typów klocków (najwyżej 256)" % len(types)
+    for name in types:
+        if len(name.encode("utf-8")) > 0xFF:
+            return "za długa nazwa typu %r" % name
+    if not 0 <= map_data["tile_size"] <= 0xFFFF:
+        return "tile_size %s poza zakresem uint16" % map_data["tile_size"]
+    return None
+
+
+# Zamiana danych mapy (jak w json) na bajty formatu binarnego (source_mtime - st_mtime_ns pliku json)
+def encode(map_data, source=b"", source_mtime=0):
+    tilemap = map_data["tilemap"]
+    offgrid = map_data["offgrid"]
+    types = []
+    type_ids = {}
+    for tile in list(tilemap.values()) + offgrid:
+        if tile["type"] not in type_ids:
+            type_ids[tile["type"]] = len(types)
+            types.append(tile["type"])
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, map_data["tile_size"], len(types), len(tilemap), len(offgrid),
+                                len(source), zlib.crc32(source), source_mtime))
+    for name in types:
+        name = name.encode("utf-8")
+        out += struct.pack("<B", len(name)) + name
+    # Wyrównanie do 8 bajtów, żeby kolumny dało się czytać bezpośrednio jako tablice
+    out += bytes(-len(out) % 8)
+    columns = [
+        array("d", [tile["pos"][0] for tile in offgrid]),
+        array("d", [tile["pos"][1] for tile in offgrid]),
+        array("h", [tile["pos"][0] for tile in tilemap.values()]),
+        array("h", [tile["pos"][1] for tile in tilemap.values()]),
+        array("B", [type_ids[tile["type"]] for tile in offgrid]),
+        array("B", [tile["variant"] for tile in offgrid]),
+        array("B", [type_ids[tile["type"]] for tile in tilemap.values()]),
+        array("B", [tile["variant"] for tile in tilemap.values()]),
+    ]
+    for column in columns:
+        if sys.byteorder != "little":
+            column.byteswap()
+        out += column.tobytes()
+    return bytes(out)
+
+
+# Odczyt nagłówka i widoków na kolumny (bez kopiowania danych)
+def decode(buffer):
+    view = memoryview(buffer)
+    magic, version, tile_size, type_count, tile_count, offgrid_count, source_size, source_crc, source_mtime = \
+        HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Nieobsługiwany format mapy")
+    offset = HEADER.size
+    types = []
+    for i in range(type_count):
+        length = view[offset]
+        types.append(bytes(view[offset + 1:offset + 1 + length]).decode("utf-8"))
+        offset += 1 + length
+    offset += -offset % 8
+
+    def column(typecode, count):
+        nonlocal offset
+        size = array(typecode).itemsize * count
+        data = view[offset:offset + size]
+        offset += size
+        if sys.byteorder != "little":
+            swapped = array(typecode, data.tobytes())
+            swapped.byteswap()
+            return swapped
+        return data.cast(typecode)
+
+    offgrid_x = column("d", offgrid_count)
+    offgrid_y = column("d", offgrid_count)
+    xs = column("h", tile_count)
+    ys = column("h", tile_count)
+    offgrid_types = column("B", offgrid_count)
+    offgrid_variants = column("B", offgrid_count)
+    tile_types = column("B", tile_count)
+    variants = column("B", tile_count)
+    return {
+        "tile_size": tile_size,
+        "types": types,
+        "tiles": (xs, ys, tile_types, variants),
+        "offgrid": (offgrid_x, offgrid_y, offgrid_types, offgrid_variants),
+        "source": (source_size, source_crc, source_mtime),
+    }
+
+
+# Klocki poza gridem ze zdekodowanych kolumn (jak w json)
+def offgrid_tiles(decoded):
+    types = decoded["types"]
+    return [{"type": types[tile_type], "variant": variant, "pos": [x, y]}
+            for x, y, tile_type, variant in zip(*decoded["offgrid"])]
+
+
+# Wczytanie mapy binarnej przez mmap; zwraca zdekodowane kolumny albo None, jeśli plik nie istnieje
+# lub nie pasuje do json, z którego powstał (source_path - ścieżka json albo None). Zgodność sprawdzana
+# z rozmiaru i czasu modyfikacji json; sam json czytany (i porównywany przez crc32) tylko, gdy czas się różni
+def load_binary(path, source_path=None):
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        with f:
+            # mmap zostanie zamknięty razem z ostatnim widokiem na kolumny
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        decoded = decode(buffer)
+    except (ValueError, struct.error):
+        return None
+    if source_path is None:
+        return decoded
+    try:
+        stat = os.stat(source_path)
+    except FileNotFoundError:
+        # Sama mapa binarna bez json
+        return decoded
+    size, crc, mtime = decoded["source"]
+    if stat.st_size != size:
+        return None
+    if stat.st_mtime_ns == mtime:
+        return decoded
+    # Np. po checkoucie czas modyfikacji jest inny, choć treść ta sama
+    f = open(source_path, "rb")
+    source = f.read()
+    f.close()
+    if zlib.crc32(source) != crc:
+        return None
+    return decoded
+
+
+# source_path - zapisany już plik json (jego czas modyfikacji trafia do nagłówka). Mapa, która nie mieści się
+# w formacie binarnym, nie jest zapisywana (a stary plik binarny jest usuwany), więc gra wczyta json;
+# zwraca, czy plik binarny został zapisany
+def save_binary(path, map_data, source=b"", source_path=None):
+    problem = unsupported(map_data)
+    if problem is not None:
+        print("Uwaga: mapa zapisana tylko w json (%s)" % problem)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return False
+    source_mtime = os.stat(source_path).st_mtime_ns if source_path is not None else 0
+    data = encode(map_data, source, source_mtime)
+    f = open(path, "wb")
+    f.write(data)
+    f.close()
+    return True
+
+
+# Konwersja wszystkich map json do formatu binarnego:
+#   python -m scripts.mapformat [pliki.json ...]
+def convert(paths):
+    for path in paths:
+        f = open(path, "rb")
+        source = f.read()
+        f.close()
+        if save_binary(binary_path(path), json.loads(source), source, path):
+            print(path, "->", binary_path(path), os.path.getsize(binary_path(path)), "B")
+
+
+if __name__ == "__main__":
+    convert(sys.argv[1:] or sorted(glob.glob("data/map/*.json")))
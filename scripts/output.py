@@ -0,0 +1,43 @@
+import pygame
+
+
+# Rozdzielczość z linii poleceń, np. "1280x720" -> (1280, 720)
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+# Wyjście obrazu: skalowanie wewnętrznej powierzchni (display) na ekran bez alokacji nowej powierzchni co klatkę
+class Output:
+    def __init__(self, screen, display, size=None):
+        self.screen = screen
+        self.display = display
+        self.target = None
+        self.set_size(size or screen.get_size())
+
+    # Ustawienie rozdzielczości wyjściowej (obraz jest wyśrodkowany na ekranie)
+    def set_size(self, size):
+        self.size = (int(size[0]), int(size[1]))
+        self.position = ((self.screen.get_width() - self.size[0]) // 2,
+                         (self.screen.get_height() - self.size[1]) // 2)
+        # Skalowanie wprost do ekranu, gdy obraz zajmuje cały ekran i formaty się zgadzają
+        self.direct = (self.size == self.screen.get_size()
+                       and self.display.get_bitsize() == self.screen.get_bitsize()
+                       and self.display.get_masks() == self.screen.get_masks())
+        if self.direct:
+            self.target = None
+        else:
+            self.target = pygame.Surface(self.size, 0, self.display)
+
+    def present(self):
+        pygame.transform.scale(self.display, self.size, self.screen if self.direct else self.target)
+        if not self.direct:
+            # Pas wokół mniejszego obrazu mógł zostać po menu rysowanym na całym ekranie
+            if self.size != self.screen.get_size():
+                self.screen.fill((0, 0, 0))
+            self.screen.blit(self.target, self.position)
+
+    # Zamiana pozycji na ekranie (np. myszy) na pozycję na wewnętrznej powierzchni
+    def display_pos(self, pos):
+        return (int((pos[0] - self.position[0]) * self.display.get_width() / self.size[0]),
+                int((pos[1] - self.position[1]) * self.display.get_height() / self.size[1]))
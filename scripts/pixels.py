@@ -0,0 +1,59 @@
+import sys
+import time
+
+import pygame
+
+
+# Ustawienie przezroczystych pikseli (alfa 0) na neutralny kolor (np. brąz z alfą 0), żeby ich kolor
+# nie prześwitywał przy skalowaniu. Powierzchnie bez alfy na piksel (także z colorkey) zostają bez zmian -
+# ich przezroczystość zależy od koloru piksela, więc podmiana koloru by ją zepsuła
+def clean_transparent_pixels(surface, replace_with=(0, 0, 0, 0)):
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return surface
+    try:
+        # Bez NumPy pygame.surfarray jest tylko zaślepką, więc sprawdzamy sam import NumPy
+        import numpy
+        from pygame import surfarray
+    except ImportError:
+        return clean_transparent_pixels_slow(surface, replace_with)
+    # Widoki na piksele powierzchni (bez kopiowania), zwalniane na końcu funkcji
+    pixels = surfarray.pixels2d(surface)
+    alpha = surfarray.pixels_alpha(surface)
+    pixels[numpy.equal(alpha, 0)] = surface.map_rgb(replace_with)
+    del pixels, alpha
+    return surface
+
+
+# Wersja piksel po pikselu, gdy NumPy nie jest dostępny
+def clean_transparent_pixels_slow(surface, replace_with=(0, 0, 0, 0)):
+    width, height = surface.get_size()
+    for x in range(width):
+        for y in range(height):
+            r, g, b, a = surface.get_at((x, y))
+            if a == 0:
+                surface.set_at((x, y), replace_with)
+    return surface
+
+
+# Porównanie obu wersji na tle przeskalowanym do rozmiaru ekranu gry:
+#   python -m scripts.pixels [ścieżka obrazka]
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "data/images/WWilds.png"
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    source = pygame.transform.scale(pygame.image.load(path).convert_alpha(), (1920, 1080))
+    # Część tła przezroczysta, żeby było co czyścić
+    source.fill((90, 60, 30, 0), source.get_rect().inflate(-source.get_width() // 2, -source.get_height() // 2))
+    print(path, "%dx%d" % source.get_size())
+    results = {}
+    for name, clean in (("NumPy", clean_transparent_pixels), ("piksel po pikselu", clean_transparent_pixels_slow)):
+        surface = source.copy()
+        start = time.perf_counter()
+        clean(surface)
+        results[name] = time.perf_counter() - start
+        print("%-18s %9.1f ms" % (name, results[name] * 1000))
+        if name == "NumPy":
+            fast = surface
+    same = pygame.image.tobytes(fast, "RGBA") == pygame.image.tobytes(surface, "RGBA")
+    print("przyspieszenie %.0fx, wyniki %s" % (results["piksel po pikselu"] / results["NumPy"],
+                                               "identyczne" if same else "RÓŻNE"))
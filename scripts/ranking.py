@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import sys
+from abc import ABC, abstractmethod
+
+from scripts.utility import save_to_excel, load_from_excel
+
+EXCEL_PATH = "Ranking.xlsx"
+SQLITE_PATH = "Ranking.db"
+# Domyślny plik eksportu - osobny, żeby nie nadpisać Ranking.xlsx, z którego wyniki są migrowane
+EXPORT_PATH = "Ranking_export.xlsx"
+
+
+# Zamiana czasu "MM:SS" na milisekundy
+def parse_time(text):
+    minutes, seconds = str(text).split(":")
+    return (int(minutes) * 60 + int(seconds)) * 1000
+
+
+# Zamiana milisekund na czas "MM:SS" (tak jak licznik w grze)
+def format_time(time_ms):
+    seconds = time_ms // 1000
+    return f"{seconds // 60:02}:{seconds % 60:02}"
+
+
+# Wspólny interfejs magazynu wyników
+class RankingStore(ABC):
+    # Dodanie wyniku (replay - ścieżka powtórki przebiegu albo None)
+    def add(self, user_name, time_ms, total_jumps, level, replay=None):
+        self.add_many([(user_name, time_ms, total_jumps, level, replay)])
+
+    # Dodanie wielu wyników naraz: lista (nazwa, czas w ms, skoki, mapa, ścieżka powtórki)
+    @abstractmethod
+    def add_many(self, results):
+        pass
+
+    # Najlepsze wyniki na mapie jako lista (nazwa, czas w ms, skoki)
+    @abstractmethod
+    def top(self, level, n):
+        pass
+
+    def close(self):
+        pass
+
+
+# Wyniki w pliku Ranking.xlsx (każdy zapis i odczyt przetwarza cały plik; bez ścieżek powtórek)
+class ExcelRankingStore(RankingStore):
+    def add_many(self, results):
+        for user_name, time_ms, total_jumps, level, replay in results:
+            save_to_excel(user_name, format_time(time_ms), total_jumps, level)
+
+    def top(self, level, n):
+        results = [(row[0], parse_time(row[1]), row[2]) for row in load_from_excel(level)]
+        results.sort(key=lambda x: x[1])
+        return results[:n]
+
+
+# Wyniki w bazie SQLite z indeksem (mapa, czas) - najlepsze wyniki w O(log n)
+class SQLiteRankingStore(RankingStore):
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # WAL - odczyty w grze nie czekają na zapisy z wątku zapisującego
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS results ("
+                                "id INTEGER PRIMARY KEY, user_name TEXT NOT NULL, time_ms INTEGER NOT NULL, "
+                                "total_jumps INTEGER NOT NULL, map TEXT NOT NULL)")
+        # Ścieżka powtórki wyniku (do weryfikacji); bazy sprzed tej kolumny dostają ją tutaj
+        if "replay" not in [row[1] for row in self.connection.execute("PRAGMA table_info(results)")]:
+            self.connection.execute("ALTER TABLE results ADD COLUMN replay TEXT")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_map_time ON results (map, time_ms)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)")
+        self.connection.commit()
+
+    def add_many(self, results):
+        with self.connection:
+            self.connection.executemany("INSERT INTO results (user_name, time_ms, total_jumps, map, replay) "
+                                        "VALUES (?, ?, ?, ?, ?)", results)
+
+    def top(self, level, n):
+        return self.connection.execute("SELECT user_name, time_ms, total_jumps FROM results WHERE map = ? "
+                                       "ORDER BY time_ms, id LIMIT ?", (level, n)).fetchall()
+
+    # Wszystkie wyniki jako lista (id, nazwa, czas w ms, skoki, mapa, ścieżka powtórki albo None)
+    def entries(self):
+        return self.connection.execute("SELECT id, user_name, time_ms, total_jumps, map, replay FROM results "
+                                       "ORDER BY id").fetchall()
+
+    # Jednorazowe przeniesienie wyników z Ranking.xlsx (kolejne wywołania nic nie robią)
+    def migrate_from_excel(self, path=EXCEL_PATH):
+        if self.connection.execute("SELECT 1 FROM migrations WHERE name = ?", (path,)).fetchone():
+            return 0
+        results = []
+        if os.path.exists(path):
+            from openpyxl import load_workbook
+
+            ws = load_workbook(path, read_only=True).active
+            for row in ws.iter_rows(min_row=2, values_only=True):
+                if len(row) < 4 or None in row[:4]:
+                    continue
+                try:
+                    results.append((str(row[0]), parse_time(row[1]), int(row[2]), str(row[3])))
+                except ValueError:
+                    print("Pominięto niepoprawny wiersz:", row)
+        with self.connection:
+            self.connection.executemany("INSERT INTO results (user_name, time_ms, total_jumps, map) "
+                                        "VALUES (?, ?, ?, ?)", results)
+            self.connection.execute("INSERT INTO migrations (name) VALUES (?)", (path,))
+        return len(results)
+
+    # Eksport wszystkich wyników do arkusza w układzie Ranking.xlsx (nie do samego źródła migracji)
+    def export_excel(self, path=EXPORT_PATH, source=EXCEL_PATH):
+        if os.path.abspath(path) == os.path.abspath(source):
+            raise ValueError("Eksport nadpisałby " + source)
+        from openpyxl import Workbook
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Ranking"
+        ws.append(['User Name', 'Time', 'Total Jumps', "Map"])
+        for user_name, time_ms, total_jumps, level in self.connection.execute(
+                "SELECT user_name, time_ms, total_jumps, map FROM results ORDER BY map, time_ms, id"):
+            ws.append([user_name, format_time(time_ms), total_jumps, level])
+        wb.save(path)
+
+    def close(self):
+        self.connection.close()
+
+
+# Domyślny magazyn gry: baza SQLite, przy pierwszym użyciu zasilona wynikami z Ranking.xlsx
+def open_store(path=SQLITE_PATH, excel_path=EXCEL_PATH):
+    store = SQLiteRankingStore(path)
+    store.migrate_from_excel(excel_path)
+    return store
+
+
+# Obsługa z linii poleceń:
+#   python -m scripts.ranking migrate [plik.xlsx]   (domyślnie Ranking.xlsx)
+#   python -m scripts.ranking export [plik.xlsx]    (domyślnie Ranking_export.xlsx; najpierw migracja
+#                                                    Ranking.xlsx, tak jak przy starcie gry)
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("migrate", "export"):
+        print("Użycie: python -m scripts.ranking migrate|export [plik.xlsx]")
+        sys.exit(1)
+    if sys.argv[1] == "migrate":
+        excel = sys.argv[2] if len(sys.argv) > 2 else EXCEL_PATH
+        ranking = SQLiteRankingStore()
+        print("Przeniesiono wyników:", ranking.migrate_from_excel(excel))
+    else:
+        excel = sys.argv[2] if len(sys.argv) > 2 else EXPORT_PATH
+        ranking = open_store()
+        try:
+            ranking.export_excel(excel)
+        except ValueError as e:
+            print(e)
+            ranking.close()
+            sys.exit(1)
+        print("Zapisano", excel)
+    ranking.close()
@@ -0,0 +1,281 @@
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+from scripts.entities import Player, TICK_RATE
+from scripts.simulation import Simulation, LEFT, RIGHT, JUMP, PAUSE, START_POS, PLAYER_SIZE, LEVELS, level_path
+
+# Binarny zapis przebiegu (.pjr), little-endian:
+#   nagłówek, napisy (u8 długość + utf-8): poziom, wersja gry, gracz,
+#   zdarzenia: varint ((różnica kroków od poprzedniego zdarzenia << 4) | kod zdarzenia)
+MAGIC = b"PJRP"
+VERSION = 1
+# Wersja fizyki gry - zmieniana, gdy zmiana kodu zmienia przebieg symulacji
+BUILD = "physics-2"
+# magic, wersja, kroki na sekundę, crc32 mapy json, pozycja startowa x, y,
+# kroki do końca przebiegu, skoki, wygrana, liczba zdarzeń
+HEADER = struct.Struct("<4sHHIddIIBI")
+REPLAY_EXT = ".pjr"
+REPLAY_DIR = "replays"
+# Indeks najlepszych przebiegów w katalogu powtórek: poziom -> {name, ticks, build, crc, tick_rate}
+INDEX_NAME = "best.json"
+# Akcje w kolejności kodów; kod zdarzenia = indeks akcji * 2 + wciśnięcie
+ACTIONS = [LEFT, RIGHT, JUMP, None, PAUSE]
+ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+
+
+# crc32 pliku mapy (do sprawdzenia, czy powtórka pasuje do mapy)
+def map_crc(path):
+    try:
+        f = open(path, "rb")
+        source = f.read()
+        f.close()
+    except FileNotFoundError:
+        return 0
+    return zlib.crc32(source)
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+# Napis skracany do 255 bajtów na granicy znaku (bez uciętego wielobajtowego znaku)
+def _write_string(out, text):
+    text = text.encode("utf-8")[:255].decode("utf-8", "ignore").encode("utf-8")
+    out.append(len(text))
+    out += text
+
+
+def _read_string(data, offset):
+    length = data[offset]
+    return bytes(data[offset + 1:offset + 1 + length]).decode("utf-8"), offset + 1 + length
+
+
+# Zapisany przebieg poziomu: wejście gracza krok po kroku i wynik, jaki dał
+class Replay:
+    def __init__(self, level, events, start_pos=START_POS, ticks=0, total_jumps=0, win=False, user_name="",
+                 build=BUILD, crc=0, tick_rate=TICK_RATE):
+        self.level = level
+        # (krok, akcja, wciśnięcie)
+        self.events = events
+        self.start_pos = start_pos
+        self.ticks = ticks
+        self.total_jumps = total_jumps
+        self.win = win
+        self.user_name = user_name
+        self.build = build
+        self.crc = crc
+        self.tick_rate = tick_rate
+        # Następne zdarzenie do odtworzenia
+        self.position = 0
+
+    # Przebieg zapisany przez symulację
+    @classmethod
+    def from_simulation(cls, simulation, level, user_name=""):
+        player = simulation.player
+        return cls(level, list(simulation.events), tuple(simulation.start_pos), simulation.ticks,
+                   player.total_jumps, player.win, user_name, crc=map_crc(level_path(level)))
+
+    def encode(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.tick_rate, self.crc, self.start_pos[0], self.start_pos[1],
+                                    self.ticks, self.total_jumps, self.win, len(self.events)))
+        _write_string(out, self.level)
+        _write_string(out, self.build)
+        _write_string(out, self.user_name)
+        last_tick = 0
+        for tick, action, pressed in self.events:
+            _write_varint(out, (tick - last_tick) << 4 | ACTION_CODES[action] * 2 + bool(pressed))
+            last_tick = tick
+        return bytes(out)
+
+    # with_events=False - tylko nagłówek (bez zdarzeń), np. do wyszukiwania najlepszego przebiegu
+    @classmethod
+    def decode(cls, data, with_events=True):
+        magic, version, tick_rate, crc, x, y, ticks, total_jumps, win, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Nieobsługiwany format powtórki")
+        offset = HEADER.size
+        level, offset = _read_string(data, offset)
+        build, offset = _read_string(data, offset)
+        user_name, offset = _read_string(data, offset)
+        if not with_events:
+            count = 0
+        events = []
+        tick = 0
+        for i in range(count):
+            value, offset = _read_varint(data, offset)
+            tick += value >> 4
+            code = value & 0xF
+            events.append((tick, ACTIONS[code >> 1], bool(code & 1)))
+        return cls(level, events, (x, y), ticks, total_jumps, bool(win), user_name, build, crc, tick_rate)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = open(path, "wb")
+        f.write(self.encode())
+        f.close()
+
+    @classmethod
+    def load(cls, path, with_events=True):
+        f = open(path, "rb")
+        data = f.read()
+        f.close()
+        return cls.decode(data, with_events)
+
+    # Podanie symulacji zdarzeń z obecnego kroku (wywoływane przed każdym krokiem)
+    def feed(self, simulation):
+        events = self.events
+        while self.position < len(events) and events[self.position][0] <= simulation.ticks:
+            tick, action, pressed = events[self.position]
+            simulation.handle_input(action, pressed)
+            self.position += 1
+
+    # Odtworzenie przebiegu bez okna; zwraca symulację po ostatnim kroku
+    # (tilemap - już wczytana mapa poziomu, np. współdzielona przez wiele powtórek)
+    def simulate(self, path=None, tilemap=None):
+        if tilemap is None:
+            simulation = Simulation.load(self.level, path, self.start_pos)
+        else:
+            simulation = Simulation(tilemap, Player(None, self.start_pos, PLAYER_SIZE))
+        self.position = 0
+        while simulation.ticks < self.ticks and not simulation.player.win:
+            self.feed(simulation)
+            simulation.step()
+        return simulation
+
+
+# Ścieżka nowej powtórki przebiegu poziomu (kolejne przebiegi w tej samej sekundzie dostają numer)
+def replay_path(level, directory=REPLAY_DIR):
+    name = "%s %s" % (level, time.strftime("%Y%m%d-%H%M%S"))
+    path = os.path.join(directory, name + REPLAY_EXT)
+    number = 1
+    while os.path.exists(path):
+        number += 1
+        path = os.path.join(directory, "%s %d%s" % (name, number, REPLAY_EXT))
+    return path
+
+
+def _load_index(directory):
+    try:
+        f = open(os.path.join(directory, INDEX_NAME), "r")
+        index = json.load(f)
+        f.close()
+    except (OSError, ValueError):
+        return None
+    return index if isinstance(index, dict) else None
+
+
+def _save_index(directory, index):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, INDEX_NAME)
+    # Zapis przez plik tymczasowy - przerwany zapis nie zostawi uszkodzonego indeksu
+    f = open(path + ".tmp", "w")
+    json.dump(index, f)
+    f.close()
+    os.replace(path + ".tmp", path)
+
+
+# Wpis indeksu pasuje do obecnej mapy i wersji gry, a jego plik wciąż istnieje
+def _entry_current(entry, directory, crc):
+    return isinstance(entry, dict) and entry.get("build") == BUILD and entry.get("crc") == crc and \
+        entry.get("tick_rate") == TICK_RATE and os.path.exists(os.path.join(directory, str(entry.get("name"))))
+
+
+def _index_entry(name, replay):
+    return {"name": name, "ticks": replay.ticks, "build": replay.build, "crc": replay.crc,
+            "tick_rate": replay.tick_rate}
+
+
+# Przebudowa indeksu ze wszystkich powtórek w katalogu (katalogi sprzed indeksu, ręczne zmiany plików)
+def rebuild_index(directory=REPLAY_DIR):
+    index = {}
+    crcs = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(REPLAY_EXT):
+            continue
+        try:
+            replay = Replay.load(os.path.join(directory, name), with_events=False)
+        except (OSError, ValueError, IndexError, struct.error):
+            continue
+        if not replay.win or replay.build != BUILD or replay.tick_rate != TICK_RATE or replay.level not in LEVELS:
+            continue
+        if replay.level not in crcs:
+            crcs[replay.level] = map_crc(level_path(replay.level))
+        if replay.crc != crcs[replay.level]:
+            continue
+        entry = index.get(replay.level)
+        if entry is None or replay.ticks < entry["ticks"]:
+            index[replay.level] = _index_entry(name, replay)
+    _save_index(directory, index)
+    return index
+
+
+# Zapis przebiegu pod nową ścieżką w katalogu powtórek; wygrany przebieg krótszy od najlepszego
+# (albo zastępujący nieaktualny wpis) trafia do indeksu. Zwraca ścieżkę powtórki
+def save_run(replay, directory=REPLAY_DIR):
+    path = replay_path(replay.level, directory)
+    replay.save(path)
+    if replay.win:
+        index = _load_index(directory)
+        if index is None:
+            index = rebuild_index(directory)
+        entry = index.get(replay.level)
+        if not _entry_current(entry, directory, replay.crc) or replay.ticks < entry["ticks"]:
+            index[replay.level] = _index_entry(os.path.basename(path), replay)
+            _save_index(directory, index)
+    return path
+
+
+# Najkrótszy wygrany przebieg poziomu nagrany na obecnej mapie i w obecnej wersji gry
+# (None, jeśli takiego nie ma); zwraca (ścieżka, powtórka). Czytany jest tylko indeks i jeden plik -
+# katalog przeglądany jest raz, gdy indeksu jeszcze nie ma
+def best_replay(level, directory=REPLAY_DIR):
+    if not os.path.isdir(directory):
+        return None
+    index = _load_index(directory)
+    if index is None:
+        index = rebuild_index(directory)
+    entry = index.get(level)
+    if not _entry_current(entry, directory, map_crc(level_path(level))):
+        return None
+    path = os.path.join(directory, entry["name"])
+    try:
+        replay = Replay.load(path)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    if replay.level != level or not replay.win or replay.ticks != entry["ticks"]:
+        return None
+    return path, replay
+
+
+# Podgląd powtórki albo przebudowa indeksu najlepszych przebiegów:
+#   python -m scripts.replay plik.pjr
+#   python -m scripts.replay --index [katalog powtórek]
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--index":
+        for level, entry in sorted(rebuild_index(sys.argv[2] if len(sys.argv) > 2 else REPLAY_DIR).items()):
+            print("%s: %s (%d kroków)" % (level, entry["name"], entry["ticks"]))
+        sys.exit(0)
+    replay = Replay.load(sys.argv[1])
+    print("%s (%s), gracz %r: %d kroków, %d skoków, %s, %d zdarzeń"
+          % (replay.level, replay.build, replay.user_name, replay.ticks, replay.total_jumps,
+             "wygrana" if replay.win else "bez wygranej", len(replay.events)))
@@ -0,0 +1,11 @@
+# Ekran (menu, pauza, podsumowanie) z widżetami budowanymi tylko raz, przy pierwszym użyciu
+class Screen:
+    def __init__(self, build):
+        # build - funkcja zwracająca słownik nazwa -> widżet
+        self.build = build
+        self.widgets = None
+
+    def __getitem__(self, name):
+        if self.widgets is None:
+            self.widgets = self.build()
+        return self.widgets[name]
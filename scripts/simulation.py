@@ -0,0 +1,133 @@
+import random
+import sys
+import time
+
+from scripts.entities import Player, TICK_RATE
+from scripts.tilemap import Tilemap
+
+# Akcje gracza (klawisze A, D, W); None - dowolny inny klawisz
+LEFT = "left"
+RIGHT = "right"
+JUMP = "jump"
+# Przełączenie pauzy (nie zmienia fizyki, ale trafia do zapisu przebiegu)
+PAUSE = "pause"
+# Pozycja startowa i rozmiar gracza
+START_POS = (1, 200)
+PLAYER_SIZE = (16, 28)
+
+
+# Poziomy gry (nazwy plików map w data/map)
+LEVELS = ['Galactic Tower', 'Winter Wilds', 'Corrupted Fields']
+
+
+# Ścieżka mapy poziomu
+def level_path(level):
+    return "data/map/" + str(level) + ".json"
+
+
+# Symulacja fizyki gracza na mapie krok po kroku. Używa jej gra, a bez obiektu gry (game=None)
+# działa bez okna, miksera i obrazków - do testów, weryfikacji powtórek i analizy poziomów
+class Simulation:
+    def __init__(self, tilemap, player):
+        self.tilemap = tilemap
+        self.player = player
+        self.start_pos = tuple(player.pos)
+        # Wciśnięte klawisze ruchu [lewo, prawo]
+        self.movement = [False, False]
+        # Liczba wykonanych kroków
+        self.ticks = 0
+        # Zapis wejścia: (krok, akcja, wciśnięcie) w kolejności obsługi
+        self.events = []
+
+    # Symulacja poziomu bez gry
+    @classmethod
+    def load(cls, level=None, path=None, start_pos=START_POS):
+        tilemap = Tilemap(None, tile_size=16)
+        tilemap.load(path if path is not None else level_path(level))
+        return cls(tilemap, Player(None, start_pos, PLAYER_SIZE))
+
+    # Wciśnięcie (pressed=True) albo puszczenie klawisza akcji - tak jak obsługa klawiatury w grze
+    def handle_input(self, action, pressed):
+        self.events.append((self.ticks, action, pressed))
+        player = self.player
+        if action == PAUSE:
+            return
+        if pressed:
+            player.last_movement = 2
+            # Jeśli w to skok
+            if action == JUMP:
+                player.jumping = True
+                self.movement = [0, 0]
+                player.jump_ticks = 0
+            # Ruch w lewo/prawo tylko, gdy gracz nie ładuje skoku
+            if not player.jumping:
+                if action == LEFT:
+                    self.movement[0] = True
+                if action == RIGHT:
+                    self.movement[1] = True
+            else:
+                if action == LEFT:
+                    player.last_movement = 1
+                if action == RIGHT:
+                    player.last_movement = 0
+        else:
+            if action == LEFT:
+                self.movement[0] = False
+            if action == RIGHT:
+                self.movement[1] = False
+            if action == JUMP:
+                player.jumping = False
+                player.jump_power = player.charged_jump_power()
+                player.jump(player.jump_power)
+                player.reset_jump_power()
+
+    # Wykonanie n kroków z obecnie wciśniętymi klawiszami (zatrzymuje się po wygranej)
+    def step(self, n=1):
+        for i in range(n):
+            if self.player.win:
+                break
+            self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+            self.ticks += 1
+        return self.player.win
+
+    # Czas gry w ms wynikający z liczby kroków
+    def elapsed_ms(self):
+        return self.ticks * 1000 // TICK_RATE
+
+    # Stan gracza po ostatnim kroku
+    def state(self):
+        player = self.player
+        return {
+            "tick": self.ticks,
+            "pos": tuple(player.pos),
+            "velocity": tuple(player.velocity),
+            "collisions": dict(player.collisions),
+            "collide_type_bottom": player.collide_type_bottom,
+            "jumping": player.jumping,
+            "air_time": player.air_time,
+            "total_jumps": player.total_jumps,
+            "win": player.win,
+        }
+
+
+# Pomiar szybkości symulacji bez okna:
+#   python -m scripts.simulation [poziom] [kroki]
+if __name__ == "__main__":
+    level = sys.argv[1] if len(sys.argv) > 1 else "Winter Wilds"
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    simulation = Simulation.load(level)
+    start = time.perf_counter()
+    rng = random.Random(0)
+    for i in range(ticks // 100):
+        # Skok w losowym kierunku z losowym czasem ładowania, potem lądowanie
+        direction = rng.choice([LEFT, RIGHT])
+        simulation.handle_input(JUMP, True)
+        simulation.handle_input(direction, True)
+        simulation.step(rng.randint(5, 50))
+        simulation.handle_input(direction, False)
+        simulation.handle_input(JUMP, False)
+        simulation.step(100 - simulation.ticks % 100)
+    seconds = time.perf_counter() - start
+    print("%s: %d kroków w %.2f s (%.0fx szybciej niż gra w czasie rzeczywistym)"
+          % (level, simulation.ticks, seconds, simulation.ticks / TICK_RATE / seconds))
+    print(simulation.state())
@@ -0,0 +1,88 @@
+import subprocess
+import sys
+import time
+
+# Pomiar czasu startu gry (uruchamiać z katalogu gry):
+#   python -m scripts.startup [-n 5] [poziom]  - czas do pierwszej klatki menu albo poziomu (mediana z n uruchomień)
+#   python -m scripts.startup --imports        - najwolniejsze importy wg python -X importtime
+# Każdy pomiar to osobny proces, więc obejmuje też import modułów
+
+
+# Przerwanie gry po narysowaniu pierwszej klatki
+class _FirstFrame(Exception):
+    pass
+
+
+# Pomiar w bieżącym procesie; zwraca czasy w ms od początku funkcji (import, Game(), pierwsza klatka)
+def first_frame(level=None):
+    start = time.perf_counter()
+    import pygame
+    import game
+    imported = time.perf_counter()
+
+    # Klatki ekranu ładowania się nie liczą
+    def stop(*args):
+        if not platform_jumper.loading:
+            raise _FirstFrame
+
+    pygame.display.update = stop
+    pygame.display.flip = stop
+    platform_jumper = game.Game()
+    created = time.perf_counter()
+    try:
+        if level is None:
+            platform_jumper.main_menu()
+        else:
+            platform_jumper.current_level = level
+            platform_jumper.run(level)
+    except _FirstFrame:
+        pass
+    frame = time.perf_counter()
+    return (imported - start) * 1000, (created - start) * 1000, (frame - start) * 1000
+
+
+# Mediana z kilku uruchomień w osobnych procesach
+def benchmark(level=None, runs=5):
+    results = []
+    for i in range(runs):
+        args = [sys.executable, "-m", "scripts.startup", "--child"] + ([level] if level else [])
+        process = subprocess.run(args, capture_output=True, text=True)
+        if process.returncode != 0:
+            sys.exit(process.stderr)
+        results.append([float(value) for value in process.stdout.split()[-3:]])
+    return [sorted(column)[len(column) // 2] for column in zip(*results)]
+
+
+# Moduły z największym czasem importu (własnym) przy imporcie gry
+def import_times(limit=15):
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import game"],
+                            capture_output=True, text=True, check=True).stderr
+    times = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((int(self_us), int(cumulative_us), name.strip()))
+    total = max(cumulative for self_us, cumulative, name in times)
+    times.sort(reverse=True)
+    return total, times[:limit]
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    if arguments[:1] == ["--child"]:
+        print(*("%.1f" % value for value in first_frame(arguments[1] if len(arguments) > 1 else None)))
+    elif arguments[:1] == ["--imports"]:
+        total, slowest = import_times()
+        print("import game: %.1f ms" % (total / 1000))
+        for self_us, cumulative_us, name in slowest:
+            print("%8.1f ms %8.1f ms  %s" % (self_us / 1000, cumulative_us / 1000, name))
+    else:
+        runs = 5
+        if arguments[:1] == ["-n"]:
+            runs = int(arguments[1])
+            arguments = arguments[2:]
+        level = arguments[0] if arguments else None
+        imported, created, frame = benchmark(level, runs)
+        print("%s: import %.1f ms, Game() %.1f ms, pierwsza klatka %.1f ms"
+              % (level or "menu", imported, created, frame))
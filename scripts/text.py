@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+import pygame
+
+# Maksymalna liczba zapamiętanych wyrenderowanych napisów
+MAX_TEXTS = 256
+
+# (ścieżka, rozmiar) -> Font
+_fonts = {}
+# (ścieżka, rozmiar, tekst, kolor, antyaliasing) -> Surface, w kolejności ostatniego użycia
+_texts = OrderedDict()
+
+
+# Czcionka wczytywana raz dla danej ścieżki i rozmiaru (None - domyślna czcionka pygame)
+def get_font(path, size):
+    key = (path, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(path, size)
+        _fonts[key] = font
+    return font
+
+
+# Wyrenderowany napis z pamięci podręcznej (LRU)
+def render_text(text, color, font_path=None, size=30, antialias=True):
+    key = (font_path, size, text, tuple(color), antialias)
+    surface = _texts.get(key)
+    if surface is None:
+        surface = get_font(font_path, size).render(text, antialias, color)
+        _texts[key] = surface
+        while len(_texts) > MAX_TEXTS:
+            _texts.popitem(last=False)
+    else:
+        _texts.move_to_end(key)
+    return surface
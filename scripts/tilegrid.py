@@ -0,0 +1,159 @@
+from array import array
+
+# Pusta komórka w tablicy typów
+EMPTY = 0
+# Powyżej takiej liczby komórek na klocek prostokąt ograniczający uznajemy za zbyt rzadki
+MAX_CELLS_PER_TILE = 8
+
+
+# Gęsta siatka klocków: tablice (id typu, wariant, numer kolejny) nad prostokątem ograniczającym poziom
+# i słownik dla klocków leżących poza nim. Numer kolejny zachowuje kolejność klocków jak w słowniku
+# mapy json (kolejność wczytania i dodawania), od której zależy fizyka
+class TileGrid:
+    def __init__(self, origin=(0, 0), size=(0, 0)):
+        self.origin = (origin[0], origin[1])
+        self.width = size[0]
+        self.height = size[1]
+        self.cells = array("B", bytes(self.width * self.height))
+        self.variants = array("B", bytes(self.width * self.height))
+        # Numery kolejne w uint32 (array("L") ma 8 bajtów na 64-bitowym Linuksie)
+        self.orders = array("I", bytes(self.width * self.height * array("I").itemsize))
+        # (x, y) -> (typ, wariant, numer kolejny) dla klocków poza prostokątem
+        self.sparse = {}
+        self.next_order = 0
+        # Id typu 0 oznacza pustą komórkę, więc nazwy są przesunięte o 1
+        self.types = [None]
+        self.type_ids = {}
+        self.count = 0
+
+    # Budowanie siatki z kolumn (np. widoków na plik binarny mapy)
+    @classmethod
+    def from_columns(cls, xs, ys, tile_types, variants, type_names):
+        if not len(xs):
+            return cls()
+        x_min, x_max = min(xs), max(xs)
+        y_min, y_max = min(ys), max(ys)
+        if (x_max - x_min + 1) * (y_max - y_min + 1) > max(4096, MAX_CELLS_PER_TILE * len(xs)):
+            # Pojedyncze odległe klocki nie powinny rozdmuchać tablicy - bierzemy 1. i 99. percentyl
+            sorted_xs, sorted_ys = sorted(xs), sorted(ys)
+            low, high = len(xs) // 100, len(xs) - 1 - len(xs) // 100
+            x_min, x_max = sorted_xs[low], sorted_xs[high]
+            y_min, y_max = sorted_ys[low], sorted_ys[high]
+        grid = cls((x_min, y_min), (x_max - x_min + 1, y_max - y_min + 1))
+        grid_ids = [grid._type_id(name) for name in type_names]
+        width, height = grid.width, grid.height
+        cells, grid_variants, orders = grid.cells, grid.variants, grid.orders
+        for x, y, tile_type, variant in zip(xs, ys, tile_types, variants):
+            x -= x_min
+            y -= y_min
+            if 0 <= x < width and 0 <= y < height:
+                index = y * width + x
+                if cells[index] == EMPTY:
+                    grid.count += 1
+                    orders[index] = grid.next_order
+                    grid.next_order += 1
+                cells[index] = grid_ids[tile_type]
+                grid_variants[index] = variant
+            else:
+                grid.set(x + x_min, y + y_min, type_names[tile_type], variant)
+        return grid
+
+    # Budowanie siatki ze słownika w formacie json ("x;y" -> {"type", "variant", "pos"})
+    @classmethod
+    def from_dict(cls, tilemap):
+        tiles = list(tilemap.values())
+        type_names = sorted({tile["type"] for tile in tiles})
+        type_ids = {name: i for i, name in enumerate(type_names)}
+        return cls.from_columns([tile["pos"][0] for tile in tiles], [tile["pos"][1] for tile in tiles],
+                                [type_ids[tile["type"]] for tile in tiles], [tile["variant"] for tile in tiles],
+                                type_names)
+
+    # Zamiana z powrotem na słownik w formacie json (w kolejności klocków)
+    def to_dict(self):
+        return {str(x) + ";" + str(y): {"type": tile_type, "variant": variant, "pos": [x, y]}
+                for x, y, tile_type, variant in self.items()}
+
+    def _index(self, x, y):
+        x -= self.origin[0]
+        y -= self.origin[1]
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return -1
+
+    def _type_id(self, tile_type):
+        type_id = self.type_ids.get(tile_type)
+        if type_id is None:
+            type_id = len(self.types)
+            self.types.append(tile_type)
+            self.type_ids[tile_type] = type_id
+        return type_id
+
+    # (typ, wariant) klocka albo None
+    def get(self, x, y):
+        index = self._index(x, y)
+        if index < 0:
+            tile = self.sparse.get((x, y))
+            return None if tile is None else tile[:2]
+        type_id = self.cells[index]
+        if type_id == EMPTY:
+            return None
+        return self.types[type_id], self.variants[index]
+
+    # Nowy klocek trafia na koniec kolejności, zamiana istniejącego zostawia go na jego miejscu
+    def set(self, x, y, tile_type, variant):
+        index = self._index(x, y)
+        if index < 0:
+            tile = self.sparse.get((x, y))
+            if tile is None:
+                self.count += 1
+                self.sparse[(x, y)] = (tile_type, variant, self.next_order)
+                self.next_order += 1
+            else:
+                self.sparse[(x, y)] = (tile_type, variant, tile[2])
+            return
+        if self.cells[index] == EMPTY:
+            self.count += 1
+            self.orders[index] = self.next_order
+            self.next_order += 1
+        self.cells[index] = self._type_id(tile_type)
+        self.variants[index] = variant
+
+    # Usunięcie klocka; zwraca usunięty (typ, wariant) albo None
+    def remove(self, x, y):
+        index = self._index(x, y)
+        if index < 0:
+            tile = self.sparse.pop((x, y), None)
+            if tile is not None:
+                tile = tile[:2]
+        else:
+            tile = self.get(x, y)
+            self.cells[index] = EMPTY
+            self.variants[index] = 0
+        if tile is not None:
+            self.count -= 1
+        return tile
+
+    def __contains__(self, pos):
+        return self.get(pos[0], pos[1]) is not None
+
+    def __len__(self):
+        return self.count
+
+    # Wszystkie klocki jako (x, y, typ, wariant) w kolejności klocków
+    def items(self):
+        cells, orders = self.cells, self.orders
+        tiles = [(orders[index], index) for index in range(len(cells)) if cells[index] != EMPTY]
+        tiles += [(order, pos) for pos, (tile_type, variant, order) in self.sparse.items()]
+        tiles.sort()
+        for order, index in tiles:
+            if isinstance(index, tuple):
+                tile_type, variant, order = self.sparse[index]
+                yield index[0], index[1], tile_type, variant
+            else:
+                y, x = divmod(index, self.width)
+                yield x + self.origin[0], y + self.origin[1], self.types[cells[index]], self.variants[index]
+
+    # Typy klocków występujące w siatce
+    def tile_types(self):
+        used = {self.types[type_id] for type_id in set(self.cells) if type_id != EMPTY}
+        return used | {tile[0] for tile in self.sparse.values()}
@@ -1,60 +1,240 @@
 import pygame
 import json
 
+from scripts import mapformat
+from scripts.buckets import SpatialBuckets
+from scripts.chunks import ChunkCache
+from scripts.tilegrid import TileGrid
+
 # Typy klocków, które mają kolizje
 PHYSICS_TILES = {"grass", "stone", "Evil-Purple", "Pyramid-Yellow", "Emerald-Green",
                  "Diamond-Blue", "Castle-blue", "grass_purple", "grass_thick_snow", "plain_snow", "ice", "win_tiles"}
 
 
+# Najwięcej zapamiętanych wyników physics_rects
+MAX_PHYSICS_CACHE = 4096
+
+
+# Łączenie sąsiednich klocków z kolizją tego samego typu w jak największe prostokąty
+# Zwraca listę (x, y, szerokość, wysokość, typ) w jednostkach klocków
+def merge_solid_tiles(solid_tiles):
+    merged = []
+    visited = set()
+    for x, y in sorted(solid_tiles, key=lambda cell: (cell[1], cell[0])):
+        if (x, y) in visited:
+            continue
+        tile_type = solid_tiles[(x, y)]
+        # Rozszerzanie w prawo
+        width = 1
+        while solid_tiles.get((x + width, y)) == tile_type and (x + width, y) not in visited:
+            width += 1
+        # Rozszerzanie w dół, dopóki cały wiersz pasuje
+        height = 1
+        while all(solid_tiles.get((x + i, y + height)) == tile_type and (x + i, y + height) not in visited
+                  for i in range(width)):
+            height += 1
+        for j in range(height):
+            for i in range(width):
+                visited.add((x + i, y + j))
+        merged.append((x, y, width, height, tile_type))
+    return merged
+
+
 # Klasa dotycząca mapy klocków
 class Tilemap:
     def __init__(self, game, tile_size=16):
         self.game = game
         self.tile_size = tile_size
-        self.tilemap = {}
+        # Klocki w gridzie: gęsta tablica (typ, wariant) nad obszarem poziomu
+        self.tilemap = TileGrid()
         self.offgrid_tiles = []
+        # Geometria kolizji "wypieczona" z klocków: lista [Rect, typ] (jeden prostokąt na klocek)
+        # i mapa komórka -> indeks prostokąta klocka
+        self.collision_rects = []
+        self.collision_cells = {}
+        # Połączone prostokąty klocków tego samego typu (broad phase kolizji) i mapa komórka -> indeks
+        # połączonego prostokąta, który ją pokrywa
+        self.merged_rects = []
+        self.merged_cells = {}
+        self.collision_dirty = True
+        # Wyniki physics_rects dla zakresów komórek (czyszczone przy przeliczeniu kolizji)
+        self.physics_cache = {}
+        # Prerenderowane fragmenty mapy do szybkiego renderowania
+        self.chunks = ChunkCache(self)
+        # Kubełki z klockami poza gridem (budowane przy pierwszym użyciu, bo potrzebują rozmiarów obrazków)
+        self.offgrid_index = None
+
+    # Dodanie klocka w gridzie (unieważnia kolizje i chunki, których dotyczy)
+    def add_tile(self, pos, tile_type, variant):
+        old = self.tilemap.get(pos[0], pos[1])
+        if old == (tile_type, variant):
+            return
+        self.tilemap.set(pos[0], pos[1], tile_type, variant)
+        if tile_type in PHYSICS_TILES or (old is not None and old[0] in PHYSICS_TILES):
+            self.collision_dirty = True
+        self.chunks.invalidate(pos)
+
+    # Usunięcie klocka z gridu
+    def remove_tile(self, pos):
+        old = self.tilemap.remove(pos[0], pos[1])
+        if old is not None:
+            if old[0] in PHYSICS_TILES:
+                self.collision_dirty = True
+            self.chunks.invalidate(pos)
+
+    # Klocek na pozycji w gridzie jako (typ, wariant) albo None
+    def tile_at(self, pos):
+        return self.tilemap.get(pos[0], pos[1])
+
+    # Typy klocków użyte na mapie (w gridzie i poza nim)
+    def tile_types(self):
+        return self.tilemap.tile_types() | {tile["type"] for tile in self.offgrid_tiles}
+
+    # Dodanie klocka poza gridem
+    def add_offgrid(self, tile):
+        self.offgrid_tiles.append(tile)
+        if self.offgrid_index is not None:
+            self.offgrid_index.insert(tile, self._offgrid_rect(tile))
 
-    # Fizyka klocków(kolizja)
-    def physics_rects(self, pos):
-        rects = []
-        for tile in self.tilemap:
-            if self.tilemap[tile]["type"] in PHYSICS_TILES:
-                rects.append(
-                    [pygame.Rect(self.tilemap[tile]["pos"][0] * self.tile_size,
-                                 self.tilemap[tile]["pos"][1] * self.tile_size, self.tile_size,
-                                 self.tile_size), self.tilemap[tile]["type"]])
-        return rects
-
-    # Zapisywanie w json
+    # Usunięcie klocka poza gridem
+    def remove_offgrid(self, tile):
+        for i, other in enumerate(self.offgrid_tiles):
+            if other is tile:
+                del self.offgrid_tiles[i]
+                break
+        if self.offgrid_index is not None:
+            self.offgrid_index.remove(tile)
+
+    # Klocki poza gridem nachodzące na prostokąt (we współrzędnych świata)
+    def offgrid_in_rect(self, rect):
+        if self.offgrid_index is None:
+            self.offgrid_index = SpatialBuckets()
+            for tile in self.offgrid_tiles:
+                self.offgrid_index.insert(tile, self._offgrid_rect(tile))
+        return self.offgrid_index.query(rect)
+
+    def _offgrid_rect(self, tile):
+        img = self.game.assets[tile["type"]][tile["variant"]]
+        # Z zapasem 1 px, bo pozycje są zmiennoprzecinkowe
+        return pygame.Rect(int(tile["pos"][0]) - 1, int(tile["pos"][1]) - 1, img.get_width() + 2,
+                           img.get_height() + 2)
+
+    # Wypiekanie geometrii kolizji dla całego poziomu
+    def bake_collision(self):
+        self.collision_rects = []
+        self.collision_cells = {}
+        for x, y, tile_type, variant in self.tilemap.items():
+            if tile_type in PHYSICS_TILES:
+                self.collision_cells[(x, y)] = len(self.collision_rects)
+                self.collision_rects.append([pygame.Rect(x * self.tile_size, y * self.tile_size, self.tile_size,
+                                                         self.tile_size), tile_type])
+        self.merged_rects = []
+        self.merged_cells = {}
+        solid_tiles = {cell: self.collision_rects[index][1] for cell, index in self.collision_cells.items()}
+        for x, y, width, height, tile_type in merge_solid_tiles(solid_tiles):
+            for j in range(height):
+                for i in range(width):
+                    self.merged_cells[(x + i, y + j)] = len(self.merged_rects)
+            self.merged_rects.append(pygame.Rect(x * self.tile_size, y * self.tile_size, width * self.tile_size,
+                                                 height * self.tile_size))
+        self.collision_dirty = False
+        self.physics_cache.clear()
+
+    # Fizyka klocków(kolizja) - numery połączonych prostokątów w otoczeniu prostokąta encji
+    # (z marginesem jednej komórki)
+    def physics_rects(self, entity_rect):
+        left, top, width, height = entity_rect
+        return self._window_rects((left // self.tile_size - 1, top // self.tile_size - 1,
+                                   (left + width) // self.tile_size + 1, (top + height) // self.tile_size + 1))
+
+    # Numery połączonych prostokątów pokrywających zakres komórek
+    def _window_rects(self, key):
+        if self.collision_dirty:
+            self.bake_collision()
+        # Encja zwykle przez wiele kroków zostaje w tych samych komórkach
+        indices = self.physics_cache.get(key)
+        if indices is not None:
+            return indices
+        if len(self.physics_cache) >= MAX_PHYSICS_CACHE:
+            self.physics_cache.clear()
+        x_start, y_start, x_end, y_end = key
+        cells = self.merged_cells
+        indices = []
+        for y in range(y_start, y_end + 1):
+            for x in range(x_start, x_end + 1):
+                index = cells.get((x, y))
+                if index is not None and index not in indices:
+                    indices.append(index)
+        self.physics_cache[key] = indices
+        return indices
+
+    # Klocki z kolizją nachodzące na entity_rect, w kolejności collision_rects - tak jak przy sprawdzaniu
+    # wszystkich klocków mapy po kolei. Między kolejnymi klockami entity_rect może zostać przesunięty;
+    # następny klocek jest wtedy szukany w oknie physics_rects wokół nowego położenia.
+    # Połączone prostokąty, których hitbox nie dotyka, odpadają od razu razem ze wszystkimi klockami;
+    # w trafionych liczą się tylko klocki pod hitboxem
+    def collisions(self, entity_rect):
+        tile_size = self.tile_size
+        start = 0
+        while True:
+            first = None
+            for index in self.physics_rects(entity_rect):
+                merged = self.merged_rects[index]
+                if not entity_rect.colliderect(merged):
+                    continue
+                clip = entity_rect.clip(merged)
+                cells = self.collision_cells
+                for y in range(clip.top // tile_size, (clip.bottom - 1) // tile_size + 1):
+                    for x in range(clip.left // tile_size, (clip.right - 1) // tile_size + 1):
+                        tile = cells[(x, y)]
+                        if tile >= start and (first is None or tile < first):
+                            first = tile
+            if first is None:
+                return
+            yield self.collision_rects[first]
+            start = first + 1
+
+    # Wszystkie klocki z kolizją
+    def all_physics_rects(self):
+        if self.collision_dirty:
+            self.bake_collision()
+        return self.collision_rects
+
+    # Zapisywanie w json (wraz z binarną kopią do szybkiego wczytywania)
     def save(self, path):
-        f = open(path, "w")
-        json.dump({"tilemap": self.tilemap, "tile_size": self.tile_size, "offgrid": self.offgrid_tiles}, f)
+        map_data = {"tilemap": self.tilemap.to_dict(), "tile_size": self.tile_size, "offgrid": self.offgrid_tiles}
+        source = json.dumps(map_data).encode("utf-8")
+        f = open(path, "wb")
+        f.write(source)
         f.close()
+        mapformat.save_binary(mapformat.binary_path(path), map_data, source, path)
 
-    # Wczytywanie z json
+    # Wczytywanie mapy - z pliku binarnego, jeśli jest aktualny (json czytany tylko w przeciwnym razie)
     def load(self, path):
-        f = open(path, "r")
-        map_data = json.load(f)
-        f.close()
+        decoded = mapformat.load_binary(mapformat.binary_path(path), path)
 
-        self.tilemap = map_data["tilemap"]
-        self.tile_size = map_data["tile_size"]
-        self.offgrid_tiles = map_data["offgrid"]
+        if decoded is not None:
+            # Siatka budowana bezpośrednio z kolumn pliku binarnego
+            self.tilemap = TileGrid.from_columns(*decoded["tiles"], decoded["types"])
+            self.tile_size = decoded["tile_size"]
+            self.offgrid_tiles = mapformat.offgrid_tiles(decoded)
+        else:
+            f = open(path, "r")
+            map_data = json.load(f)
+            f.close()
+            self.tilemap = TileGrid.from_dict(map_data["tilemap"])
+            self.tile_size = map_data["tile_size"]
+            self.offgrid_tiles = map_data["offgrid"]
+        self.collision_dirty = True
+        self.chunks.clear()
+        self.offgrid_index = None
 
-    # Renderowanie klocków w gridzie
+    # Renderowanie klocków w gridzie (przez prerenderowane chunki)
     def render(self, surf, offset=(0, 0)):
-        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
-                loc = str(x) + ";" + str(y)
-                if loc in self.tilemap:
-                    tile = self.tilemap[loc]
-                    surf.blit(self.game.assets[tile["type"]][tile["variant"]],
-                              (
-                                  tile["pos"][0] * self.tile_size - offset[0],
-                                  tile["pos"][1] * self.tile_size - offset[1]))
-
-    # Renderowanie klocków poza gridem
+        self.chunks.render(surf, offset=offset)
+
+    # Renderowanie klocków poza gridem (tylko tych w widoku)
     def render_offset(self, surf, offset=(0, 0)):
-        for tile in self.offgrid_tiles:
+        for tile in self.offgrid_in_rect(pygame.Rect(offset[0], offset[1], surf.get_width(), surf.get_height())):
             surf.blit(self.game.assets[tile["type"]][tile["variant"]],
                       (tile["pos"][0] - offset[0], tile["pos"][1] - offset[1]))
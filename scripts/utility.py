@@ -1,28 +1,80 @@
 import pygame
 import os
 import sys
-from openpyxl import Workbook
-from openpyxl import load_workbook
-from openpyxl.styles.builtins import currency
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 BASE_IMG_PATH = "data/images/"
 
+# Wspólna pamięć podręczna obrazków interfejsu: (ścieżka, alfa) -> Surface
+_image_cache = {}
+# Obrazki zdekodowane wcześniej przez decode_images, czekające na convert_alpha: ścieżka -> Surface
+_decoded = {}
+
 
 # Załadowanie obrazka
 def load_image(path):
-    img = pygame.image.load(BASE_IMG_PATH + path).convert_alpha()
+    img = _decoded.pop(path, None)
+    if img is None:
+        img = pygame.image.load(BASE_IMG_PATH + path)
+    return img.convert_alpha()
+
+
+# Ścieżki obrazków w katalogu (w kolejności używanej przez load_images)
+def image_paths(path):
+    return [path + "/" + img_name for img_name in sorted(os.listdir(BASE_IMG_PATH + path))]
+
+
+# Równoległe dekodowanie obrazków w puli wątków (pygame zwalnia GIL przy dekodowaniu);
+# konwersja do formatu ekranu zostaje na głównym wątku w load_image.
+# progress(gotowe, wszystkie) jest wywoływane na głównym wątku po każdym obrazku
+def decode_images(paths, progress=None, workers=None):
+    paths = [path for path in paths if path not in _decoded]
+    if not paths:
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(pygame.image.load, BASE_IMG_PATH + path): path for path in paths}
+        for done, future in enumerate(as_completed(futures), 1):
+            _decoded[futures[future]] = future.result()
+            if progress is not None:
+                progress(done, len(paths))
+
+
+# Załadowanie obrazka po pełnej ścieżce, tylko raz dla danej ścieżki
+# Zwrócona powierzchnia jest współdzielona, więc nie wolno jej modyfikować
+def get_image(path, alpha=True):
+    key = (path, alpha)
+    img = _image_cache.get(key)
+    if img is None:
+        img = pygame.image.load(path)
+        img = img.convert_alpha() if alpha else img.convert()
+        _image_cache[key] = img
     return img
 
 
+# Słownik zasobów wczytywanych dopiero przy pierwszym użyciu: nazwa -> funkcja ładująca
+class LazyAssets(dict):
+    def __init__(self, loaders):
+        super().__init__()
+        self.loaders = loaders
+
+    def __missing__(self, key):
+        value = self.loaders[key]()
+        self[key] = value
+        return value
+
+
 # Załadowanie wielu obrazków
 def load_images(path):
     images = []
-    for img_name in sorted(os.listdir(BASE_IMG_PATH + path)):
-        images.append(load_image(path + "/" + img_name))
+    for img_path in image_paths(path):
+        images.append(load_image(img_path))
     return images
 
 # Zapisywanie do xlsx
 def save_to_excel(user_name, time, total_jumps, level_beaten):
+    # openpyxl importowany dopiero przy zapisie, żeby nie spowalniał startu gry i edytora
+    from openpyxl import Workbook, load_workbook
+
     filename = 'Ranking.xlsx'
 
     try:
@@ -41,11 +93,9 @@ def save_to_excel(user_name, time, total_jumps, level_beaten):
 
     wb.save(filename)
 
-from openpyxl import load_workbook
-
-from openpyxl import load_workbook
-
 def load_from_excel(current_map):
+    from openpyxl import load_workbook
+
     filename = 'Ranking.xlsx'
     try:
         wb = load_workbook(filename)
@@ -80,16 +130,20 @@ def load_from_excel(current_map):
 
 # Klasa z animacjami
 class Animation:
-    def __init__(self, images, img_dur=5, loop=True):
+    def __init__(self, images, img_dur=5, loop=True, flipped_images=None):
         # Atrybuty
         self.images = images
+        # Klatki odwrócone w poziomie, tworzone raz przy wczytaniu i współdzielone przez kopie
+        if flipped_images is None:
+            flipped_images = [pygame.transform.flip(img, True, False) for img in images]
+        self.flipped_images = flipped_images
         self.loop = loop
         self.img_duration = img_dur
         self.done = False
         self.frame = 0
 
     def copy(self):
-        return Animation(self.images, self.img_duration, self.loop)
+        return Animation(self.images, self.img_duration, self.loop, self.flipped_images)
 
     # Update animacji
     def update(self):
@@ -100,5 +154,6 @@ class Animation:
             if self.frame >= self.img_duration * len(self.images) - 1:
                 self.done = True
 
-    def img(self):
-        return self.images[int(self.frame / self.img_duration)]
+    def img(self, flip=False):
+        images = self.flipped_images if flip else self.images
+        return images[int(self.frame / self.img_duration)]
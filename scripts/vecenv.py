@@ -0,0 +1,433 @@
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from scripts.entities import Player, TICK_RATE
+from scripts.simulation import Simulation, LEFT, RIGHT, JUMP, START_POS, PLAYER_SIZE, level_path
+from scripts.tilemap import Tilemap
+
+# Akcja agenta w kroku: maska trzymanych klawiszy
+LEFT_KEY = 1
+RIGHT_KEY = 2
+JUMP_KEY = 4
+# Kolejność obsługi zmian klawiszy w kroku: najpierw puszczenia, potem wciśnięcia
+# (skok przed kierunkiem, więc wciśnięcie skoku i kierunku naraz daje skok w tę stronę)
+RELEASE_ORDER = [(LEFT_KEY, LEFT), (RIGHT_KEY, RIGHT), (JUMP_KEY, JUMP)]
+PRESS_ORDER = [(JUMP_KEY, JUMP), (LEFT_KEY, LEFT), (RIGHT_KEY, RIGHT)]
+# Obserwacja agenta: kolumny tablicy zwracanej przez reset i step
+OBSERVATION = ["x", "y", "vx", "vy", "air_time", "on_ground", "jumping", "jump_ticks"]
+# Tablice stanu agentów (po jednej wartości na agenta)
+STATE = ["pos_x", "pos_y", "prev_x", "prev_y", "velocity_x", "velocity_y", "collide_up", "collide_down",
+         "collide_right", "collide_left", "bottom_type", "jumping", "flip", "jumped", "last_movement", "snow",
+         "air_time", "jumps", "jump_ticks", "win", "total_jumps", "move_left", "move_right", "keys", "ticks", "done"]
+
+
+# Zmiana trzymanych klawiszy w pojedynczej symulacji tak samo, jak robi to VecEnv.step
+def press_keys(simulation, held, keys):
+    for key, action in RELEASE_ORDER:
+        if held & key and not keys & key:
+            simulation.handle_input(action, False)
+    for key, action in PRESS_ORDER:
+        if keys & key and not held & key:
+            simulation.handle_input(action, True)
+
+
+# K niezależnych graczy na jednej mapie liczonych naraz w tablicach NumPy, z interfejsem jak w gym
+# (reset, step). Każdy krok daje dokładnie te same liczby co Player.update z tym samym wejściem
+# (press_keys + Simulation.step); animacje i dźwięki nie są liczone
+class VecEnv:
+    def __init__(self, tilemap, count, start_pos=START_POS, size=PLAYER_SIZE, max_ticks=None):
+        self.count = count
+        self.start_pos = start_pos
+        self.size = size
+        # Liczba kroków, po której przebieg agenta się kończy (None - do wygranej)
+        self.max_ticks = max_ticks
+        self.max_jump_power = 0.85
+        self.load_tilemap(tilemap)
+        self.reset()
+
+    # Środowisko na mapie poziomu
+    @classmethod
+    def load(cls, level=None, path=None, count=1, **kwargs):
+        tilemap = Tilemap(None, tile_size=16)
+        tilemap.load(path if path is not None else level_path(level))
+        return cls(tilemap, count, **kwargs)
+
+    # Klocki z kolizją jako tablice (w kolejności Tilemap.collision_rects) i siatka komórek -> numer klocka
+    def load_tilemap(self, tilemap):
+        self.tilemap = tilemap
+        tile_size = self.tile_size = tilemap.tile_size
+        rects = tilemap.all_physics_rects()
+        # Ostatni prostokąt (numer self.empty) to pusta komórka - nigdy nie bierze udziału w kolizji
+        # i przy sortowaniu numerów w oknie trafia na koniec
+        self.empty = len(rects)
+        self.rect_x = np.array([rect.x for rect, tile_type in rects] + [0], dtype=np.int64)
+        self.rect_y = np.array([rect.y for rect, tile_type in rects] + [0], dtype=np.int64)
+        self.rect_w = np.array([rect.w for rect, tile_type in rects] + [0], dtype=np.int64)
+        self.rect_h = np.array([rect.h for rect, tile_type in rects] + [0], dtype=np.int64)
+        self.tile_types = sorted({tile_type for rect, tile_type in rects})
+        self.rect_type = np.array([self.tile_types.index(tile_type) for rect, tile_type in rects] + [-1],
+                                  dtype=np.int16)
+        self.snow_type = self._type_id("grass_thick_snow")
+        self.ice_type = self._type_id("ice")
+        self.win_type = self._type_id("win_tiles")
+        # Okno komórek sprawdzanych przez Tilemap.physics_rects: najwyżej columns x rows
+        self.columns = -(-self.size[0] // tile_size) + 3
+        self.rows = -(-self.size[1] // tile_size) + 3
+        # Siatka z marginesem szerokości okna, więc okno przesunięte do krawędzi siatki widzi same puste komórki
+        margin = max(self.columns, self.rows)
+        cells = tilemap.collision_cells
+        xs = [x for x, y in cells] or [0]
+        ys = [y for x, y in cells] or [0]
+        self.grid_x = min(xs) - margin
+        self.grid_y = min(ys) - margin
+        self.grid_width = max(xs) - self.grid_x + margin + 1
+        self.grid_height = max(ys) - self.grid_y + margin + 1
+        grid = np.full((self.grid_height, self.grid_width), self.empty, dtype=np.int32)
+        for (x, y), index in cells.items():
+            grid[y - self.grid_y, x - self.grid_x] = index
+        self.grid = grid.ravel()
+        # Komórki okna: wiersz, kolumna i przesunięcie w siatce
+        self.window_row = np.repeat(np.arange(self.rows), self.columns)
+        self.window_column = np.tile(np.arange(self.columns), self.rows)
+        self.window_offset = self.window_row * self.grid_width + self.window_column
+
+    def _type_id(self, tile_type):
+        return self.tile_types.index(tile_type) if tile_type in self.tile_types else -2
+
+    # Stan początkowy wszystkich agentów (indices=None) albo wybranych; zwraca obserwacje
+    def reset(self, indices=None):
+        if indices is None:
+            count = self.count
+            self.pos_x = np.full(count, float(self.start_pos[0]))
+            self.pos_y = np.full(count, float(self.start_pos[1]))
+            self.prev_x = self.pos_x.copy()
+            self.prev_y = self.pos_y.copy()
+            self.velocity_x = np.zeros(count)
+            self.velocity_y = np.zeros(count)
+            self.collide_up = np.zeros(count, dtype=bool)
+            self.collide_down = np.zeros(count, dtype=bool)
+            self.collide_right = np.zeros(count, dtype=bool)
+            self.collide_left = np.zeros(count, dtype=bool)
+            # Numer typu klocka pod graczem w self.tile_types (-1 - jeszcze żaden)
+            self.bottom_type = np.full(count, -1, dtype=np.int16)
+            self.jumping = np.zeros(count, dtype=bool)
+            self.flip = np.zeros(count, dtype=bool)
+            self.jumped = np.zeros(count, dtype=np.int64)
+            # Player.last_movement: 0 - prawo, 1 - lewo, 2 - bez kierunku, -1 - None
+            self.last_movement = np.full(count, -1, dtype=np.int64)
+            self.snow = np.zeros(count, dtype=bool)
+            self.air_time = np.zeros(count, dtype=np.int64)
+            self.jumps = np.ones(count, dtype=np.int64)
+            self.jump_ticks = np.zeros(count, dtype=np.int64)
+            self.win = np.zeros(count, dtype=bool)
+            self.total_jumps = np.zeros(count, dtype=np.int64)
+            # Simulation.movement (lewo, prawo) i trzymane klawisze
+            self.move_left = np.zeros(count, dtype=bool)
+            self.move_right = np.zeros(count, dtype=bool)
+            self.keys = np.zeros(count, dtype=np.int64)
+            self.ticks = np.zeros(count, dtype=np.int64)
+            self.done = np.zeros(count, dtype=bool)
+        else:
+            fresh = VecEnv.__new__(VecEnv)
+            fresh.count = 1
+            fresh.start_pos = self.start_pos
+            fresh.reset()
+            for name, array in self._state().items():
+                array[indices] = getattr(fresh, name)[0]
+        return self.observe()
+
+    # Tablice stanu agentów: nazwa -> tablica
+    def _state(self):
+        return {name: getattr(self, name) for name in STATE}
+
+    def observe(self):
+        return np.stack([self.pos_x, self.pos_y, self.velocity_x, self.velocity_y, self.air_time,
+                         self.collide_down, self.jumping, self.jump_ticks], axis=1).astype(np.float64)
+
+    # Krok wszystkich agentów: actions - maski klawiszy (LEFT_KEY | RIGHT_KEY | JUMP_KEY) trzymanych
+    # w tym kroku. Zwraca (obserwacje, nagrody, koniec przebiegu, informacje); nagroda 1 za dojście do mety.
+    # Agenci po końcu przebiegu stoją w miejscu do reset
+    def step(self, actions):
+        actions = np.array(actions, dtype=np.int64)
+        frozen = self.done.copy() if self.done.any() else None
+        if frozen is not None:
+            saved = {name: array[frozen] for name, array in self._state().items()}
+
+        self._input(actions)
+        self._update()
+        self.ticks += 1
+
+        if frozen is not None:
+            for name, array in self._state().items():
+                array[frozen] = saved[name]
+        rewards = (self.win & ~self.done).astype(np.float64)
+        self.done |= self.win
+        if self.max_ticks is not None:
+            self.done |= self.ticks >= self.max_ticks
+        return self.observe(), rewards, self.done.copy(), {"win": self.win.copy(), "ticks": self.ticks.copy()}
+
+    # Simulation.handle_input dla zmian klawiszy w kolejności press_keys
+    def _input(self, actions):
+        released = self.keys & ~actions
+        pressed = actions & ~self.keys
+        self.keys = actions
+        self.move_left &= released & LEFT_KEY == 0
+        self.move_right &= released & RIGHT_KEY == 0
+        jump = released & JUMP_KEY != 0
+        if jump.any():
+            self.jumping &= ~jump
+            power = np.minimum(self.jump_ticks / TICK_RATE, self.max_jump_power)
+            self._jump(jump, power)
+        for key in (JUMP_KEY, LEFT_KEY, RIGHT_KEY):
+            press = pressed & key != 0
+            if not press.any():
+                continue
+            self.last_movement[press] = 2
+            if key == JUMP_KEY:
+                self.jumping |= press
+                self.move_left &= ~press
+                self.move_right &= ~press
+                self.jump_ticks[press] = 0
+            else:
+                direction = self.move_left if key == LEFT_KEY else self.move_right
+                direction |= press & ~self.jumping
+                self.last_movement[press & self.jumping] = 1 if key == LEFT_KEY else 0
+
+    # Player.jump dla agentów z maski (power - liczba albo tablica)
+    def _jump(self, mask, power):
+        mask = mask & (self.jumps == 1)
+        if not mask.any():
+            return
+        self.velocity_y = np.where(mask, -4.5 * power, self.velocity_y)
+        right = mask & (self.last_movement == 0)
+        left = mask & (self.last_movement == 1)
+        self.velocity_x[right] = 2
+        self.velocity_x[left] = -2
+        self.flip[right] = False
+        self.flip[left] = True
+        self.jumped += mask
+        self.jumps -= mask
+        self.total_jumps += mask
+        self.air_time[mask] = 5
+        landed = mask & self.collide_down
+        self.last_movement[landed] = 2
+        self.jumping &= ~landed
+
+    # Numery klocków z physics_rects każdego agenta w kolejności sprawdzania (self.empty - brak) i obszar
+    # okna (lewo, góra, prawo, dół) w pikselach; liczone w każdym kroku z siatki komórek,
+    # bez tablic dla wszystkich możliwych okien
+    def _physics_rects(self):
+        tile_size = self.tile_size
+        x_start = (self.pos_x // tile_size).astype(np.int64) - 1
+        y_start = (self.pos_y // tile_size).astype(np.int64) - 1
+        x_end = ((self.pos_x + self.size[0]) // tile_size).astype(np.int64) + 1
+        y_end = ((self.pos_y + self.size[1]) // tile_size).astype(np.int64) + 1
+        column = np.clip(x_start - self.grid_x, 0, self.grid_width - self.columns)
+        row = np.clip(y_start - self.grid_y, 0, self.grid_height - self.rows)
+        cells = self.grid[(row * self.grid_width + column)[:, None] + self.window_offset]
+        # Okno bywa o kolumnę lub wiersz mniejsze niż columns x rows
+        outside = (self.window_column > (x_end - x_start)[:, None]) | (self.window_row > (y_end - y_start)[:, None])
+        cells[outside] = self.empty
+        cells.sort(axis=1)
+        width = int((cells < self.empty).sum(axis=1).max())
+        area = (x_start * tile_size, y_start * tile_size, (x_end + 1) * tile_size, (y_end + 1) * tile_size)
+        return cells[:, :width], area
+
+    # PhysicsEntity.update i Player.update dla wszystkich agentów
+    def _update(self):
+        # Blokada ruchu poziomego na śniegu i w powietrzu
+        movement = self.move_right.astype(np.int64) - self.move_left
+        movement[(self.bottom_type == self.snow_type) | (self.air_time > 4)] = 0
+
+        self.prev_x = self.pos_x.copy()
+        self.prev_y = self.pos_y.copy()
+        self.collide_up[:] = False
+        self.collide_down[:] = False
+        self.collide_right[:] = False
+        self.collide_left[:] = False
+        # Mniejszy hitbox w trakcie skoku w górę
+        small = self.jumping & (self.velocity_y < 0)
+        width = np.where(small, self.size[0] - 5, self.size[0])
+        height = np.where(small, self.size[1] - 5, self.size[1])
+
+        # Oś X
+        shift = movement + self.velocity_x
+        self.pos_x = self.pos_x + shift
+        x, hit = self._collide(np.trunc(self.pos_x).astype(np.int64), np.trunc(self.pos_y).astype(np.int64),
+                               width, height, shift, True)
+        self.pos_x = np.where(hit, x, self.pos_x)
+
+        # Oś Y
+        shift = self.velocity_y
+        self.pos_y = self.pos_y + shift
+        y, hit = self._collide(np.trunc(self.pos_x).astype(np.int64), np.trunc(self.pos_y).astype(np.int64),
+                               width, height, shift, False)
+        self.pos_y = np.where(hit, y, self.pos_y)
+
+        self.flip[movement > 0] = False
+        self.flip[movement < 0] = True
+        self.velocity_y = np.minimum(5, self.velocity_y + 0.1)
+        self.velocity_y[self.collide_down | self.collide_up] = 0
+
+        # Lądowanie i rodzaj klocka pod graczem
+        self.air_time += 1
+        down = self.collide_down
+        self.air_time[down] = 0
+        self.jumps[down] = 1
+        landed = down & (self.jumped == 1)
+        self.jumping &= ~landed
+        self.jumped[landed] = 0
+        ice = down & (self.bottom_type == self.ice_type)
+        snow = down & (self.bottom_type == self.snow_type)
+        win = down & (self.bottom_type == self.win_type)
+        other = down & ~ice & ~snow & ~win
+        velocity_x = self.velocity_x
+        self.velocity_x = np.where(ice & (velocity_x > 0), np.maximum(0, velocity_x - 0.05),
+                                   np.where(ice & (velocity_x < 0), np.minimum(0, velocity_x + 0.05), velocity_x))
+        self.velocity_x[snow | other] = 0
+        self.snow[ice | other] = False
+        self.snow[snow] = True
+        self.win |= win
+
+        # Odbicie od ściany w trakcie skoku
+        wall = self.air_time > 2
+        self.velocity_x[self.collide_right & wall] = -1.8
+        self.velocity_x[~self.collide_right & self.collide_left & wall] = 1.8
+
+        # Automatyczny skok po maksymalnym czasie ładowania; kroki liczone od wciśnięcia skoku
+        jumping = self.jumping.copy()
+        self._jump(jumping & (self.jump_ticks / TICK_RATE >= self.max_jump_power), self.max_jump_power)
+        self.flip[jumping & (self.last_movement == 0)] = False
+        self.flip[jumping & (self.last_movement == 1)] = True
+        self.jump_ticks += 1
+
+    # Kolejne klocki kolizji z hitboxem (x, y, width, height) jak PhysicsEntity.collide_x/collide_y;
+    # zwraca nowe położenie hitboxu na osi ruchu i maskę agentów z kolizją
+    def _collide(self, x, y, width, height, shift, horizontal):
+        rects, (left_edge, top_edge, right_edge, bottom_edge) = self._physics_rects()
+        start = x if horizontal else y
+        bottom_type = self.bottom_type.copy()
+        hit_any = np.zeros(self.count, dtype=bool)
+        # Agenci wypchnięci poza okno physics_rects
+        escaped = np.zeros(self.count, dtype=bool)
+        forward = shift > 0
+        backward = shift < 0
+        for i in range(rects.shape[1]):
+            index = rects[:, i]
+            rect_x = self.rect_x[index]
+            rect_y = self.rect_y[index]
+            rect_w = self.rect_w[index]
+            rect_h = self.rect_h[index]
+            hit = (index < self.empty) & (x < rect_x + rect_w) & (rect_x < x + width) & \
+                (y < rect_y + rect_h) & (rect_y < y + height)
+            if not hit.any():
+                continue
+            hit_any |= hit
+            if horizontal:
+                right = hit & forward
+                left = hit & backward
+                x = np.where(right, rect_x - width, np.where(left, rect_x + rect_w, x))
+                self.collide_right |= right
+                self.collide_left |= left
+            else:
+                bottom = hit & forward
+                top = hit & backward
+                y = np.where(bottom, rect_y - height, np.where(top, rect_y + rect_h, y))
+                self.bottom_type = np.where(bottom, self.rect_type[index], self.bottom_type)
+                self.collide_down |= bottom
+                self.collide_up |= top
+            escaped |= hit & ((x < left_edge) | (y < top_edge) | (x + width > right_edge) | (y + height > bottom_edge))
+        position = x if horizontal else y
+        # Wypchnięci poza okno: ta oś od nowa, pojedynczo, z klockami spoza okna
+        for agent in np.nonzero(escaped)[0]:
+            if horizontal:
+                self.collide_right[agent] = self.collide_left[agent] = False
+                rect = pygame.Rect(start[agent], y[agent], width[agent], height[agent])
+            else:
+                self.collide_down[agent] = self.collide_up[agent] = False
+                self.bottom_type[agent] = bottom_type[agent]
+                rect = pygame.Rect(x[agent], start[agent], width[agent], height[agent])
+            position[agent], hit_any[agent] = self._collide_escaped(agent, rect, shift[agent], horizontal)
+        return position, hit_any
+
+    # PhysicsEntity.collide_x/collide_y jednego agenta wypchniętego poza okno physics_rects (z klockami
+    # z Tilemap.collisions, szukanymi wokół kolejnych położeń hitboxu); zwraca położenie hitboxu na osi ruchu
+    # i czy była kolizja
+    def _collide_escaped(self, agent, entity_rect, shift, horizontal):
+        hit = False
+        for rect, tile_type in self.tilemap.collisions(entity_rect):
+            hit = True
+            if horizontal:
+                if shift > 0:
+                    entity_rect.right = rect.left
+                    self.collide_right[agent] = True
+                if shift < 0:
+                    entity_rect.left = rect.right
+                    self.collide_left[agent] = True
+            else:
+                if shift > 0:
+                    entity_rect.bottom = rect.top
+                    self.bottom_type[agent] = self.tile_types.index(tile_type)
+                    self.collide_down[agent] = True
+                if shift < 0:
+                    entity_rect.top = rect.bottom
+                    self.collide_up[agent] = True
+        return (entity_rect.x if horizontal else entity_rect.y), hit
+
+
+# Stan agenta i w tych samych jednostkach co atrybuty gracza w symulacji
+def _agent_state(env, i):
+    return (env.pos_x[i], env.pos_y[i], env.velocity_x[i], env.velocity_y[i], bool(env.collide_up[i]),
+            bool(env.collide_down[i]), bool(env.collide_right[i]), bool(env.collide_left[i]),
+            env.tile_types[env.bottom_type[i]] if env.bottom_type[i] >= 0 else "", bool(env.jumping[i]),
+            bool(env.flip[i]), env.jumped[i], None if env.last_movement[i] < 0 else env.last_movement[i],
+            env.air_time[i], env.jumps[i], env.jump_ticks[i], bool(env.win[i]), env.total_jumps[i])
+
+
+def _player_state(player):
+    c = player.collisions
+    return (player.pos[0], player.pos[1], player.velocity[0], player.velocity[1], c["up"], c["down"],
+            c["right"], c["left"], player.collide_type_bottom, player.jumping, player.flip, player.jumped,
+            player.last_movement, player.air_time, player.jumps, player.jump_ticks, player.win, player.total_jumps)
+
+
+# Pomiar szybkości i porównanie z pojedynczymi symulacjami (losowe klawisze):
+#   python -m scripts.vecenv [poziom] [agenci] [kroki] [sprawdzani agenci]
+if __name__ == "__main__":
+    level = sys.argv[1] if len(sys.argv) > 1 else "Winter Wilds"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    ticks = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    checked = int(sys.argv[4]) if len(sys.argv) > 4 else 16
+    env = VecEnv.load(level, count=count)
+    simulations = [Simulation(Simulation.load(level).tilemap, Player(None, START_POS, PLAYER_SIZE))
+                   for i in range(min(checked, count))]
+    rng = np.random.default_rng(0)
+    # Każdy klawisz zmienia stan średnio co 20 kroków
+    changes = rng.random((ticks, count, 3)) < 0.05
+    keys = np.zeros(count, dtype=np.int64)
+    held = [0] * len(simulations)
+    compute = 0
+    mismatches = 0
+    for tick in range(ticks):
+        keys = keys ^ (changes[tick] @ np.array([LEFT_KEY, RIGHT_KEY, JUMP_KEY]))
+        start = time.perf_counter()
+        env.step(keys)
+        compute += time.perf_counter() - start
+        for i, simulation in enumerate(simulations):
+            if simulation.player.win:
+                continue
+            press_keys(simulation, held[i], int(keys[i]))
+            held[i] = int(keys[i])
+            simulation.step()
+            if _agent_state(env, i) != _player_state(simulation.player):
+                mismatches += 1
+                if mismatches <= 5:
+                    print("Różnica: agent %d, krok %d\n  %s\n  %s"
+                          % (i, tick, _agent_state(env, i), _player_state(simulation.player)))
+    print("%s: %d agentów x %d kroków w %.2f s (%.0f kroków agentów na sekundę), wygrane: %d"
+          % (level, count, ticks, compute, count * ticks / compute, env.win.sum()))
+    print("porównanie z Player.update (%d agentów): %s"
+          % (len(simulations), "identyczne" if not mismatches else "%d różnic" % mismatches))
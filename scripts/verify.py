@@ -0,0 +1,145 @@
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.ranking import SQLITE_PATH, SQLiteRankingStore
+from scripts.replay import Replay, BUILD, REPLAY_DIR, REPLAY_EXT, map_crc
+from scripts.simulation import LEVELS, level_path
+from scripts.tilemap import Tilemap
+
+# Mapy wczytane w tym procesie: poziom -> (crc32 pliku, Tilemap); każdy proces puli wczytuje mapę raz,
+# a nie dla każdej powtórki
+_tilemaps = {}
+
+
+def _level_map(level):
+    if level not in _tilemaps:
+        path = level_path(level)
+        tilemap = Tilemap(None, tile_size=16)
+        tilemap.load(path)
+        _tilemaps[level] = (map_crc(path), tilemap)
+    return _tilemaps[level]
+
+
+# Wszystkie powtórki w katalogu (także w podkatalogach)
+def replay_files(directory=REPLAY_DIR):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        paths += [os.path.join(root, name) for name in files if name.endswith(REPLAY_EXT)]
+    paths.sort()
+    return paths
+
+
+# Ponowna symulacja jednej powtórki; zwraca (ścieżka, gracz, poziom, lista niezgodności, wynik symulacji)
+# - wynik to (czas w ms, skoki, meta osiągnięta) albo None, jeśli powtórki nie dało się odtworzyć
+def verify(path):
+    try:
+        replay = Replay.load(path)
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        return path, "", "", ["nie da się odczytać: %s" % e], None
+    # Nazwa poziomu z pliku trafia do ścieżki mapy - tylko poziomy gry
+    if replay.level not in LEVELS:
+        return path, replay.user_name, replay.level, ["nieznany poziom"], None
+    problems = []
+    if replay.build != BUILD:
+        problems.append("wersja gry %s zamiast %s" % (replay.build, BUILD))
+    try:
+        crc, tilemap = _level_map(replay.level)
+    except (OSError, ValueError) as e:
+        return path, replay.user_name, replay.level, problems + ["brak mapy: %s" % e], None
+    if replay.crc != crc:
+        problems.append("inna mapa (crc %08x zamiast %08x)" % (replay.crc, crc))
+    if replay.events and replay.events[-1][0] > replay.ticks:
+        problems.append("zdarzenia po końcu przebiegu")
+    simulation = replay.simulate(tilemap=tilemap)
+    player = simulation.player
+    if simulation.ticks != replay.ticks:
+        problems.append("czas %d kroków zamiast %d" % (simulation.ticks, replay.ticks))
+    if player.total_jumps != replay.total_jumps:
+        problems.append("%d skoków zamiast %d" % (player.total_jumps, replay.total_jumps))
+    arrived = player.win and player.collide_type_bottom == "win_tiles"
+    if arrived != replay.win:
+        problems.append("meta osiągnięta" if arrived else "meta nieosiągnięta")
+    return path, replay.user_name, replay.level, problems, (simulation.elapsed_ms(), player.total_jumps, arrived)
+
+
+# Wiersz rankingu (id, gracz, czas w ms, skoki, mapa, ścieżka powtórki) porównany z ponowną symulacją
+# jego powtórki (result z verify albo None, jeśli pliku nie ma); zwraca (opis wiersza, gracz, mapa, niezgodności)
+def verify_entry(entry, result):
+    entry_id, user_name, time_ms, total_jumps, level, replay = entry
+    name = "ranking #%d" % entry_id
+    if not replay:
+        return name, user_name, level, ["brak powtórki"]
+    if result is None:
+        return name, user_name, level, ["brak pliku powtórki %s" % replay]
+    path, replay_user, replay_level, problems, outcome = result
+    problems = ["powtórka: " + problem for problem in problems]
+    if replay_user != user_name:
+        problems.append("powtórka gracza %r" % replay_user)
+    if replay_level != level:
+        problems.append("powtórka z poziomu %r" % replay_level)
+    if outcome is not None:
+        elapsed_ms, jumps, arrived = outcome
+        if not arrived:
+            problems.append("przebieg bez wygranej")
+        if elapsed_ms != time_ms:
+            problems.append("czas %d ms zamiast %d ms" % (time_ms, elapsed_ms))
+        if jumps != total_jumps:
+            problems.append("%d skoków zamiast %d" % (total_jumps, jumps))
+    return name, user_name, level, problems
+
+
+# Weryfikacja powtórek w puli procesów; wyniki w kolejności paths. Z magazynem rankingu (store) na końcu
+# dochodzi wynik każdego wiersza rankingu: brak powtórki albo niezgodność z jej ponowną symulacją
+def verify_all(paths, workers=None, store=None):
+    entries = store.entries() if store is not None else []
+    # Powtórki wyników z rankingu, które nie leżą w sprawdzanym katalogu, też trzeba odtworzyć
+    known = {os.path.normpath(path) for path in paths}
+    ranked = {os.path.normpath(entry[5]) for entry in entries if entry[5] and os.path.exists(entry[5])}
+    paths = list(paths) + sorted(ranked - known)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [verify(path) for path in paths]
+    else:
+        # Paczki po kilka powtórek zmniejszają koszt przesyłania między procesami
+        chunksize = max(1, len(paths) // (workers * 8))
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(verify, paths, chunksize=chunksize))
+    by_path = {os.path.normpath(result[0]): result for result in results}
+    entry_results = [verify_entry(entry, by_path.get(os.path.normpath(entry[5])) if entry[5] else None)
+                     for entry in entries]
+    return results[:len(paths) - len(ranked - known)] + entry_results
+
+
+# Nocna weryfikacja wyników (uruchamiać z katalogu gry):
+#   python -m scripts.verify [-j procesy] [--ranking plik.db] [katalog powtórek]
+# Sprawdzane są powtórki z katalogu i wiersze rankingu (domyślnie Ranking.db, jeśli istnieje).
+# Kod wyjścia 1, jeśli któraś powtórka albo któryś wynik w rankingu nie zgadza się z ponowną symulacją
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    workers = None
+    ranking = SQLITE_PATH
+    while len(args) > 1 and args[0] in ("-j", "--ranking"):
+        if args[0] == "-j":
+            workers = int(args[1])
+        else:
+            ranking = args[1]
+        args = args[2:]
+    paths = replay_files(args[0] if args else REPLAY_DIR)
+    store = SQLiteRankingStore(ranking) if os.path.exists(ranking) else None
+    start = time.perf_counter()
+    results = verify_all(paths, workers, store)
+    seconds = time.perf_counter() - start
+    if store is not None:
+        store.close()
+    failed = 0
+    for result in results:
+        name, user_name, level, problems = result[:4]
+        if problems:
+            failed += 1
+            print("BŁĄD %s (%s, %r): %s" % (name, level, user_name, "; ".join(problems)))
+    print("%d powtórek i wyników, %d poprawnych, %d błędnych w %.2f s"
+          % (len(results), len(results) - failed, failed, seconds))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Testy bez okna i dźwięku, uruchamiane z katalogu gry (ścieżki data/... są względne)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
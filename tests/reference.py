@@ -0,0 +1,231 @@
+import json
+
+import pygame
+
+# Fizyka gracza w pierwotnej postaci (klocki sprawdzane wszystkie po kolei w kolejności z pliku mapy,
+# siła skoku z czasu trzymania W), jako wzorzec dla testów. Zegar zamiast time.time() idzie o 1/60 s
+# na klatkę (gra w idealnych 60 fps); animacje i dźwięki pominięte
+
+PHYSICS_TILES = {"grass", "stone", "Evil-Purple", "Pyramid-Yellow", "Emerald-Green",
+                 "Diamond-Blue", "Castle-blue", "grass_purple", "grass_thick_snow", "plain_snow", "ice", "win_tiles"}
+
+
+# Czas klatki; różnica dwóch czasów liczona z numerów klatek, tak jak mierzyłby ją idealny zegar
+class FrameTime(float):
+    def __new__(cls, frame):
+        time = super().__new__(cls, frame / 60)
+        time.frame = frame
+        return time
+
+    def __sub__(self, other):
+        return (self.frame - other.frame) / 60
+
+
+class Clock:
+    def __init__(self):
+        self.frame = 0
+
+    def time(self):
+        return FrameTime(self.frame)
+
+
+class BaselineTilemap:
+    def __init__(self, path, tile_size=16):
+        f = open(path, "r")
+        map_data = json.load(f)
+        f.close()
+        self.tilemap = map_data["tilemap"]
+        self.tile_size = map_data["tile_size"]
+        self.rects = None
+
+    # Lista jest za każdym razem taka sama, więc budowana raz (pierwotnie przy każdym wywołaniu)
+    def physics_rects(self, pos):
+        if self.rects is None:
+            rects = []
+            for tile in self.tilemap:
+                if self.tilemap[tile]["type"] in PHYSICS_TILES:
+                    rects.append(
+                        [pygame.Rect(self.tilemap[tile]["pos"][0] * self.tile_size,
+                                     self.tilemap[tile]["pos"][1] * self.tile_size, self.tile_size,
+                                     self.tile_size), self.tilemap[tile]["type"]])
+            self.rects = rects
+        return self.rects
+
+
+class BaselinePlayer:
+    def __init__(self, clock, pos, size):
+        self.clock = clock
+        self.pos = list(pos)
+        self.size = size
+        self.velocity = [0, 0]
+        self.collisions = {"up": False, "down": False, "right": False, "left": False}
+        self.collide_type_bottom = ""
+        self.jumping = False
+        self.action = "idle"
+        self.flip = False
+        self.jumped = 0
+        self.last_movement = None
+        self.snow = False
+        self.air_time = 0
+        self.jumps = 1
+        self.jump_time = 0
+        self.jump_start_time = 0
+        self.win = False
+        self.total_jumps = 0
+        self.jump_power = 0
+        self.max_jump_power = 0.85
+
+    def rect(self):
+        if self.jumping and self.velocity[1] < 0:
+            return pygame.Rect(self.pos[0], self.pos[1], self.size[0] - 5, self.size[1] - 5)
+        else:
+            return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
+
+    def entity_update(self, tilemap, movement=(0, 0)):
+        self.collisions = {"up": False, "down": False, "right": False, "left": False}
+
+        self.pos[0] += movement[0] + self.velocity[0]
+        entity_rect = self.rect()
+        for rect in tilemap.physics_rects(self.pos):
+            if entity_rect.colliderect(rect[0]):
+                if movement[0] + self.velocity[0] > 0:
+                    entity_rect.right = rect[0].left
+                    self.collisions["right"] = True
+                if movement[0] + self.velocity[0] < 0:
+                    entity_rect.left = rect[0].right
+                    self.collisions["left"] = True
+                self.pos[0] = entity_rect.x
+
+        self.pos[1] += movement[1] + self.velocity[1]
+        entity_rect = self.rect()
+        for rect in tilemap.physics_rects(self.pos):
+            if entity_rect.colliderect(rect[0]):
+                if movement[1] + self.velocity[1] > 0:
+                    entity_rect.bottom = rect[0].top
+                    self.collide_type_bottom = rect[1]
+                    self.collisions["down"] = True
+                if movement[1] + self.velocity[1] < 0:
+                    entity_rect.top = rect[0].bottom
+                    self.collisions["up"] = True
+                self.pos[1] = entity_rect.y
+
+        if movement[0] > 0:
+            self.flip = False
+        if movement[0] < 0:
+            self.flip = True
+
+        self.velocity[1] = min(5, self.velocity[1] + 0.1)
+        if self.collisions["down"] or self.collisions["up"]:
+            self.velocity[1] = 0
+
+    def update(self, tilemap, movement=(0, 0)):
+        if self.collide_type_bottom == "grass_thick_snow":
+            movement = (0, movement[1])
+        elif self.air_time > 4:
+            movement = (0, movement[1])
+        self.entity_update(tilemap, movement=movement)
+        self.air_time += 1
+        if self.collisions["down"]:
+            self.air_time = 0
+            self.jumps = 1
+            if self.jumped == 1:
+                self.jumping = False
+                self.jumped = 0
+            if self.collide_type_bottom == "ice":
+                if self.velocity[0] > 0:
+                    self.velocity[0] = max(0, self.velocity[0] - 0.05)
+                elif self.velocity[0] < 0:
+                    self.velocity[0] = min(0, self.velocity[0] + 0.05)
+                self.snow = False
+            elif self.collide_type_bottom == "grass_thick_snow":
+                self.snow = True
+                self.velocity[0] = 0
+            elif self.collide_type_bottom == "win_tiles":
+                self.win = True
+            else:
+                self.snow = False
+                self.velocity[0] = 0
+
+        if self.collisions["right"] and self.air_time > 2:
+            self.velocity[0] = -1.8
+        elif self.collisions["left"] and self.air_time > 2:
+            self.velocity[0] = 1.8
+
+        if self.jumping:
+            t_now = self.clock.time()
+            if t_now - self.jump_time >= self.max_jump_power:
+                self.jump(self.max_jump_power)
+            if self.last_movement == 0:
+                self.flip = False
+            if self.last_movement == 1:
+                self.flip = True
+
+    def jump(self, power):
+        if self.jumps == 1:
+            self.velocity[1] = -4.5 * power
+            if self.last_movement == 0:
+                self.velocity[0] = 2
+                self.flip = False
+            if self.last_movement == 1:
+                self.velocity[0] = -2
+                self.flip = True
+            self.jumped += 1
+            self.jumps -= 1
+            self.total_jumps += 1
+            self.air_time = 5
+            if self.collisions["down"]:
+                self.last_movement = 2
+                self.jumping = False
+
+
+# Pierwotna pętla gry: obsługa klawiszy (akcje "left", "right", "jump", None - inny klawisz)
+# i update gracza raz na klatkę
+class BaselineGame:
+    def __init__(self, path, pos=(1, 200), size=(16, 28)):
+        self.clock = Clock()
+        self.tilemap = BaselineTilemap(path)
+        self.player = BaselinePlayer(self.clock, pos, size)
+        self.movement = [False, False]
+
+    def handle_input(self, action, pressed):
+        player = self.player
+        if pressed:
+            player.last_movement = 2
+            if action == "jump":
+                player.jumping = True
+                player.jump_start_time = self.clock.time()
+                self.movement = [0, 0]
+                player.jump_time = self.clock.time()
+            if not player.jumping:
+                if action == "left":
+                    self.movement[0] = True
+                if action == "right":
+                    self.movement[1] = True
+            else:
+                if action == "left":
+                    player.last_movement = 1
+                if action == "right":
+                    player.last_movement = 0
+        else:
+            if action == "left":
+                self.movement[0] = False
+            if action == "right":
+                self.movement[1] = False
+            if action == "jump":
+                player.jumping = False
+                jump_duration = self.clock.time() - player.jump_start_time
+                player.jump_power = min(jump_duration, player.max_jump_power)
+                player.jump(player.jump_power)
+                player.jump_power = 0
+
+    # Jedna klatka: update gracza, potem następna klatka zegara
+    def step(self):
+        self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+        self.clock.frame += 1
+
+
+# Stan gracza porównywany krok po kroku (wspólne atrybuty pierwotnego i obecnego gracza)
+def player_state(player):
+    return (tuple(player.pos), tuple(player.velocity), dict(player.collisions), player.collide_type_bottom,
+            player.jumping, player.air_time, player.jumps, player.total_jumps, player.win, player.last_movement,
+            player.flip)
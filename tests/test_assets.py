@@ -0,0 +1,62 @@
+import os
+
+import pygame
+
+from test_physics import write_map
+from scripts import atlas
+from scripts.assets import AssetRegistry, level_asset_names
+from scripts.tilemap import Tilemap
+
+
+# Zasoby poziomu biorą się z wczytanej mapy (plik nie jest czytany drugi raz) i zawierają pasek skoku
+# oraz chmury poziomów, które je mają
+def test_enter_level_uses_loaded_tilemap(tmp_path):
+    # Obrazki są konwertowane do formatu okna
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    path = write_map(tmp_path, [(0, 0, "stone"), (1, 0, "ice"), (500, 500, "grass")])
+    tilemap = Tilemap(None)
+    tilemap.load(path)
+    tilemap.add_offgrid({"type": "plain_snow", "variant": 0, "pos": [3.5, 7.0]})
+    os.remove(path)
+    assert level_asset_names(tilemap, "Winter Wilds") == {"stone", "ice", "grass", "plain_snow", "bar_jumping",
+                                                          "Winter Wilds", "clouds"}
+
+    assets = AssetRegistry()
+    assets.enter_level("Winter Wilds", tilemap)
+    assert "bar_jumping" in assets and "ice" in assets and "Winter Wilds" in assets and "clouds" in assets
+    other = Tilemap(None)
+    other.add_tile((0, 0), "stone", 0)
+    assets.enter_level("Galactic Tower", other)
+    assert "stone" in assets and "bar_jumping" in assets and "Galactic Tower" in assets
+    # Tło poprzedniego poziomu zwolnione; klocki to widoki na atlas, więc zostają
+    assert "Winter Wilds" not in assets and "clouds" not in assets and "ice" in assets
+    assert set(assets.refs) == {"bar_jumping", "Galactic Tower"}
+
+
+# Atlas jest nieaktualny po zmianie zawartości obrazka, także przy tym samym rozmiarze pliku; inny czas
+# modyfikacji przy tej samej zawartości (np. po checkoucie) go nie unieważnia
+def test_atlas_signature_detects_changed_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(atlas, "BASE_IMG_PATH", str(tmp_path) + "/")
+    (tmp_path / "tiles").mkdir()
+    image = tmp_path / "tiles" / "0.png"
+    image.write_bytes(b"abcd")
+    saved = atlas.signature(["tiles"])
+    stat = os.stat(image)
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert atlas.is_current(saved)
+    image.write_bytes(b"abce")
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    assert not atlas.is_current(saved)
+
+
+# Przy niezmienionym czasie modyfikacji pliki źródłowe nie są otwierane
+def test_atlas_check_uses_stat_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(atlas, "BASE_IMG_PATH", str(tmp_path) + "/")
+    (tmp_path / "tiles").mkdir()
+    (tmp_path / "tiles" / "0.png").write_bytes(b"abcd")
+    saved = atlas.signature(["tiles"])
+    monkeypatch.setattr(atlas, "_file_crc", None)
+    assert atlas.is_current(saved)
+    (tmp_path / "tiles" / "1.png").write_bytes(b"abcd")
+    assert not atlas.is_current(saved)
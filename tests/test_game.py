@@ -0,0 +1,96 @@
+import random
+
+import pygame
+import pytest
+
+import game as game_module
+from reference import BaselineGame, player_state
+from scripts.leaderboard import Leaderboard
+from scripts.ranking import SQLiteRankingStore
+from scripts.replay import Replay
+from scripts.simulation import Simulation, level_path, PAUSE
+
+KEYS = [pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_ESCAPE]
+
+
+# Zegar gry z losową długością klatek (od kilku klatek na krok do kilku kroków na klatkę)
+class RandomClock:
+    def __init__(self, rng):
+        self.rng = rng
+
+    def tick(self, framerate=0):
+        return self.rng.choice([0, 5, 16, 17, 33, 50, 120])
+
+
+# Gra z losowymi klawiszami i czasem klatek; zwraca symulację gry i stan gracza po każdym kroku
+def play(monkeypatch, tmp_path, level, seed, frames):
+    rng = random.Random(seed)
+    game = game_module.Game()
+    game.current_level = level
+    game.replay_dir = str(tmp_path / "replays")
+    # Ranking wczytywany przy starcie poziomu - z bazy testu, nie z Ranking.db gry
+    game.leaderboard = Leaderboard(lambda: SQLiteRankingStore(str(tmp_path / "Ranking.db")))
+    game.clock = RandomClock(rng)
+    states = []
+    update_tick = game.update_tick
+
+    def recorded_update_tick(level):
+        update_tick(level)
+        states.append(player_state(game.player))
+
+    game.update_tick = recorded_update_tick
+    held = set()
+    frame = 0
+    get_events = pygame.event.get
+
+    def scripted_events(*args, **kwargs):
+        nonlocal frame
+        get_events()
+        frame += 1
+        if frame >= frames:
+            return [pygame.event.Event(pygame.QUIT)]
+        events = []
+        if rng.random() < 0.2:
+            key = rng.choice(KEYS)
+            down = key not in held or key == pygame.K_ESCAPE
+            held.symmetric_difference_update({key} if key != pygame.K_ESCAPE else set())
+            events.append(pygame.event.Event(pygame.KEYDOWN if down else pygame.KEYUP, key=key, mod=0,
+                                             unicode="", scancode=0))
+        return events
+
+    monkeypatch.setattr(pygame.event, "get", scripted_events)
+    # Gra kończy się przez QUIT i sys.exit; pygame zostaje włączony dla kolejnych testów
+    # (czcionki w pamięci podręcznej przestają działać po pygame.quit)
+    monkeypatch.setattr(pygame, "quit", lambda: None)
+    with pytest.raises(SystemExit):
+        game.run(level)
+    return game.simulation, states
+
+
+# Kroki w pętli gry (zmienna długość klatek, pauza, rysowanie) dają ten sam przebieg co symulacja bez okna
+# i co pierwotna fizyka dla tego samego wejścia; przerwany przebieg też jest zapisany jako powtórka
+@pytest.mark.parametrize("level, seed", [("Winter Wilds", 1), ("Galactic Tower", 2)])
+def test_game_matches_headless_simulation(monkeypatch, tmp_path, level, seed):
+    simulation, states = play(monkeypatch, tmp_path, level, seed, 900)
+    assert len(states) == simulation.ticks > 300
+    assert any(action == PAUSE for tick, action, pressed in simulation.events)
+
+    events = list(simulation.events)
+    headless = Simulation.load(level)
+    reference = BaselineGame(level_path(level))
+    for tick, state in enumerate(states):
+        while events and events[0][0] <= tick:
+            event_tick, action, pressed = events.pop(0)
+            headless.handle_input(action, pressed)
+            if action != PAUSE:
+                reference.handle_input(action, pressed)
+        headless.step()
+        reference.step()
+        assert player_state(headless.player) == state, tick
+        assert player_state(reference.player) == state, tick
+
+    saved = list((tmp_path / "replays").iterdir())
+    assert len(saved) == 1
+    replay = Replay.load(str(saved[0]))
+    assert not replay.win and replay.user_name == "" and replay.ticks == simulation.ticks
+    assert replay.simulate().state() == simulation.state()
@@ -0,0 +1,74 @@
+import os
+
+from scripts import mapformat
+from scripts.tilemap import Tilemap
+
+
+def save_map(tmp_path, tile_type):
+    tilemap = Tilemap(None)
+    tilemap.add_tile((0, 0), tile_type, 0)
+    tilemap.add_tile((1, 0), "grass", 1)
+    path = str(tmp_path / "map.json")
+    tilemap.save(path)
+    return path
+
+
+def load_type(path):
+    tilemap = Tilemap(None)
+    tilemap.load(path)
+    return tilemap.tile_at((0, 0))[0]
+
+
+# Świeżo zapisana mapa binarna jest aktualna bez czytania json (wystarczy rozmiar i czas modyfikacji)
+def test_fresh_binary_skips_json(tmp_path, monkeypatch):
+    path = save_map(tmp_path, "stone")
+    monkeypatch.setattr(mapformat.zlib, "crc32", None)
+    assert mapformat.load_binary(mapformat.binary_path(path), path) is not None
+
+
+# Json zmieniony po zapisie mapy binarnej (ten sam rozmiar) jest wczytywany zamiast niej
+def test_changed_json_falls_back(tmp_path):
+    path = save_map(tmp_path, "stone")
+    f = open(path, "r")
+    source = f.read()
+    f.close()
+    f = open(path, "w")
+    f.write(source.replace("stone", "xtone"))
+    f.close()
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert mapformat.load_binary(mapformat.binary_path(path), path) is None
+    assert load_type(path) == "xtone"
+
+
+# Inny czas modyfikacji przy tej samej treści (np. po checkoucie) - mapa binarna nadal aktualna
+def test_touched_json_keeps_binary(tmp_path):
+    path = save_map(tmp_path, "stone")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert mapformat.load_binary(mapformat.binary_path(path), path) is not None
+    assert load_type(path) == "stone"
+
+
+# Klocek poza zakresem int16 albo wariant poza uint8: zostaje sam json (bez OverflowError i bez starej
+# mapy binarnej)
+def test_out_of_range_map_saved_as_json_only(tmp_path):
+    path = save_map(tmp_path, "stone")
+    assert os.path.exists(mapformat.binary_path(path))
+    for pos in [(40000, 0), (0, -40000)]:
+        tilemap = Tilemap(None)
+        tilemap.load(path)
+        tilemap.add_tile(pos, "stone", 0)
+        tilemap.save(path)
+        assert not os.path.exists(mapformat.binary_path(path))
+        loaded = Tilemap(None)
+        loaded.load(path)
+        assert loaded.tile_at(pos) == ("stone", 0)
+        tilemap.remove_tile(pos)
+        tilemap.save(path)
+        assert os.path.exists(mapformat.binary_path(path))
+    tilemap = Tilemap(None)
+    tilemap.load(path)
+    tilemap.add_offgrid({"type": "decor", "variant": 300, "pos": [4.5, 2.0]})
+    tilemap.save(path)
+    assert not os.path.exists(mapformat.binary_path(path))
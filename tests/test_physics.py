@@ -0,0 +1,120 @@
+import json
+import os
+import random
+
+import pygame
+import pytest
+
+from reference import BaselineGame, player_state
+from scripts.simulation import Simulation, level_path, LEFT, RIGHT, JUMP
+from scripts.tilemap import Tilemap
+
+ACTIONS = [LEFT, RIGHT, JUMP]
+
+
+# Losowe wciskanie i puszczanie klawiszy w obu symulacjach; zwraca pierwszy krok z różnicą albo None
+def first_difference(path, seed, ticks, start_pos=(1, 200)):
+    rng = random.Random(seed)
+    reference = BaselineGame(path, start_pos)
+    simulation = Simulation.load(path=path, start_pos=start_pos)
+    held = set()
+    for tick in range(ticks):
+        for action in ACTIONS:
+            if rng.random() < 0.05:
+                pressed = action not in held
+                held ^= {action}
+                reference.handle_input(action, pressed)
+                simulation.handle_input(action, pressed)
+        reference.step()
+        simulation.step()
+        if player_state(reference.player) != player_state(simulation.player):
+            return tick, player_state(reference.player), player_state(simulation.player)
+        if reference.player.win:
+            return None
+    return None
+
+
+def write_map(tmp_path, tiles, name="map"):
+    path = str(tmp_path / (name + ".json"))
+    tilemap = {"%d;%d" % (x, y): {"type": tile_type, "variant": 0, "pos": [x, y]} for x, y, tile_type in tiles}
+    f = open(path, "w")
+    json.dump({"tilemap": tilemap, "tile_size": 16, "offgrid": []}, f)
+    f.close()
+    return path
+
+
+# Płaska podłoga: ładowanie skoku, automatyczny skok i siła skoku jak przy pomiarze czasu w 60 fps
+def test_jump_timing_matches_baseline(tmp_path):
+    path = write_map(tmp_path, [(x, 15, "stone") for x in range(-20, 40)])
+    for seed in range(10):
+        assert first_difference(path, seed, 900, start_pos=(100, 200)) is None
+
+
+
+# Gracz w środku bloku klocków: każdy klocek wypycha go osobno (połączony prostokąt wyrzucał go od razu
+# na brzeg bloku), a po wypchnięciu poza okno physics_rects klocki szukane są wokół nowego położenia
+def test_tile_sized_collision_matches_baseline(tmp_path):
+    floor = [(x, 15, "grass") for x in range(-20, 40)]
+    column = write_map(tmp_path, [(x, y, "stone") for y in range(15) for x in (0, 1)] + floor, "column")
+    block = write_map(tmp_path, [(x, y, "stone") for y in range(5, 10) for x in range(12)] + floor, "block")
+    for seed in range(10):
+        assert first_difference(column, seed, 300, start_pos=(4, 100)) is None
+        assert first_difference(block, seed, 300, start_pos=(90, 100)) is None
+
+
+# Gracz ląduje na dwóch klockach naraz: typ pod graczem bierze się z pierwszego klocka w kolejności
+# mapy (tu zapisanej od prawej do lewej), a nie z pierwszego w wierszu
+def test_bottom_type_follows_map_order(tmp_path):
+    path = write_map(tmp_path, [(1, 15, "grass_thick_snow"), (0, 15, "plain_snow")])
+    simulation = Simulation.load(path=path, start_pos=(8, 200))
+    for tick in range(30):
+        simulation.step()
+    assert simulation.player.collide_type_bottom == "grass_thick_snow"
+    assert first_difference(path, 0, 60, start_pos=(8, 200)) is None
+
+
+# Broad phase: blok i podłoga to po jednym połączonym prostokącie, a klocki spod hitboxu wracają
+# w kolejności mapy
+def test_merged_rects_keep_tile_order(tmp_path):
+    block = [(x, y, "stone") for y in range(5, 10) for x in range(12)]
+    path = write_map(tmp_path, list(reversed(block)) + [(x, 15, "grass") for x in range(-20, 40)])
+    tilemap = Tilemap(None)
+    tilemap.load(path)
+    assert len(tilemap.physics_rects(pygame.Rect(0, 0, 400, 400))) == 2
+    hits = [rect[0].topleft for rect in tilemap.collisions(pygame.Rect(20, 90, 20, 20))]
+    assert hits == [(32, 96), (16, 96), (32, 80), (16, 80)]
+    tilemap.remove_tile((1, 6))
+    assert len(tilemap.physics_rects(pygame.Rect(0, 0, 400, 400))) > 2
+    assert (16, 96) not in [rect[0].topleft for rect in tilemap.collisions(pygame.Rect(20, 90, 20, 20))]
+
+
+# Kolejność klocków przetrwa zapis i odczyt (json i mapa binarna) oraz edycję
+def test_tile_order_survives_save_and_load(tmp_path):
+    path = write_map(tmp_path, [(3, 1, "stone"), (0, 0, "grass"), (2, 5, "ice"), (1, 1, "stone")])
+    tilemap = Tilemap(None)
+    tilemap.load(path)
+    tilemap.add_tile((0, 0), "plain_snow", 0)
+    tilemap.remove_tile((2, 5))
+    tilemap.add_tile((2, 5), "ice", 1)
+    tilemap.add_tile((500, -300), "stone", 0)
+    expected = [(3, 1), (0, 0), (1, 1), (2, 5), (500, -300)]
+    assert [(x, y) for x, y, tile_type, variant in tilemap.tilemap.items()] == expected
+    tilemap.save(path)
+    binary = os.path.splitext(path)[0] + ".pjm"
+    assert os.path.exists(binary)
+    loaded = Tilemap(None)
+    loaded.load(path)
+    assert [(x, y) for x, y, tile_type, variant in loaded.tilemap.items()] == expected
+    # Z samego json (bez mapy binarnej)
+    os.remove(binary)
+    loaded = Tilemap(None)
+    loaded.load(path)
+    assert [(x, y) for x, y, tile_type, variant in loaded.tilemap.items()] == expected
+    assert loaded.tilemap.get(0, 0) == ("plain_snow", 0)
+
+# Przebiegi na poziomach gry takie same jak z pierwotną fizyką (w tym wypchnięcie gracza na starcie
+# Galactic Tower i Corrupted Fields po wciśnięciu w prawo)
+@pytest.mark.parametrize("level", ["Galactic Tower", "Winter Wilds", "Corrupted Fields"])
+def test_levels_match_baseline(level):
+    for seed in (3, 4, 6, 9, 13):
+        assert first_difference(level_path(level), seed, 600) is None
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from scripts.leaderboard import Leaderboard
+from scripts.ranking import RankingStore, SQLiteRankingStore, open_store
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RankingStore()
+
+
+# Eksport po migracji z arkusza, bez nadpisania samego arkusza
+def test_export_after_migration(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    source = str(tmp_path / "Ranking.xlsx")
+    wb = openpyxl.Workbook()
+    wb.active.append(['User Name', 'Time', 'Total Jumps', "Map"])
+    wb.active.append(["ala", "01:05", 12, "Winter Wilds"])
+    wb.save(source)
+
+    store = open_store(str(tmp_path / "Ranking.db"), source)
+    store.add("ola", 61000, 7, "Winter Wilds")
+    assert store.top("Winter Wilds", 3) == [("ola", 61000, 7), ("ala", 65000, 12)]
+    with pytest.raises(ValueError):
+        store.export_excel(source, source)
+    exported = str(tmp_path / "export.xlsx")
+    store.export_excel(exported, source)
+    store.close()
+
+    rows = list(openpyxl.load_workbook(exported).active.iter_rows(values_only=True))
+    assert rows == [('User Name', 'Time', 'Total Jumps', "Map"), ("ola", "01:01", 7, "Winter Wilds"),
+                    ("ala", "01:05", 12, "Winter Wilds")]
+    assert len(list(openpyxl.load_workbook(source).active.iter_rows())) == 2
+    # Druga migracja tego samego arkusza nic nie dodaje
+    assert SQLiteRankingStore(str(tmp_path / "Ranking.db")).migrate_from_excel(source) == 0
+
+
+# Baza rankingu otwierana i czytana w wątku zapisującym, a nie w wątku gry
+def test_leaderboard_reads_on_writer_thread(tmp_path):
+    threads = []
+
+    def factory():
+        threads.append(threading.current_thread())
+        return SQLiteRankingStore(str(tmp_path / "Ranking.db"))
+
+    store = factory()
+    store.add("ola", 61000, 7, "Winter Wilds")
+    store.close()
+    leaderboard = Leaderboard(factory)
+    leaderboard.prefetch("Winter Wilds")
+    assert leaderboard.top("Winter Wilds") == ["1. ('ola', '01:01', 7)"]
+    leaderboard.save("ela", 59000, 3, "Winter Wilds", "replays/run.pjr")
+    leaderboard.invalidate("Winter Wilds")
+    assert leaderboard.top("Winter Wilds")[0] == "1. ('ela', '00:59', 3)"
+    leaderboard.close()
+    assert len(threads) == 2
+    assert threads[1] is not threading.main_thread()
@@ -0,0 +1,91 @@
+import os
+import random
+
+from scripts.replay import Replay, BUILD, best_replay, map_crc, save_run
+from scripts.simulation import Simulation, level_path, LEFT, RIGHT, JUMP, PAUSE
+
+LEVEL = "Winter Wilds"
+
+
+# Losowy przebieg poziomu bez okna (zdarzenia zapisuje symulacja)
+def random_run(seed, ticks):
+    rng = random.Random(seed)
+    simulation = Simulation.load(LEVEL)
+    held = set()
+    for tick in range(ticks):
+        for action in [LEFT, RIGHT, JUMP, None, PAUSE]:
+            if rng.random() < 0.04:
+                pressed = action not in held
+                held ^= {action}
+                simulation.handle_input(action, pressed)
+        simulation.step()
+    return simulation
+
+
+def test_encode_decode_round_trip():
+    # Także długie przerwy między zdarzeniami (varint na kilka bajtów)
+    events = [(0, LEFT, True), (0, LEFT, False), (1, JUMP, True), (70000, JUMP, False), (70000, None, True),
+              (2 ** 24, PAUSE, True), (2 ** 24 + 1, RIGHT, False)]
+    replay = Replay(LEVEL, events, (1.5, -200.25), 2 ** 24 + 5, 7, True, "gracz ąę", crc=0x89ABCDEF)
+    decoded = Replay.decode(replay.encode())
+    assert decoded.events == events
+    assert (decoded.level, decoded.start_pos, decoded.ticks, decoded.total_jumps, decoded.win, decoded.user_name,
+            decoded.build, decoded.crc) == (LEVEL, (1.5, -200.25), 2 ** 24 + 5, 7, True, "gracz ąę", BUILD,
+                                            0x89ABCDEF)
+    header = Replay.decode(replay.encode(), with_events=False)
+    assert header.events == [] and header.ticks == replay.ticks
+
+
+# Za długa nazwa gracza jest skracana bez rozcinania polskich znaków
+def test_long_name_cut_on_character_boundary():
+    replay = Replay(LEVEL, [], user_name="ż" * 200)
+    decoded = Replay.decode(replay.encode())
+    assert decoded.user_name == "ż" * 127
+
+
+# Zapisana i wczytana powtórka odtworzona bez okna daje ten sam stan co nagrany przebieg
+def test_saved_replay_reproduces_run(tmp_path):
+    for seed in range(3):
+        simulation = random_run(seed, 900)
+        path = str(tmp_path / ("run%d.pjr" % seed))
+        Replay.from_simulation(simulation, LEVEL, "test").save(path)
+        replay = Replay.load(path)
+        assert replay.crc == map_crc(level_path(LEVEL))
+        assert replay.simulate().state() == simulation.state()
+
+
+# Duch i ranking biorą najkrótszy wygrany przebieg z obecnej wersji gry
+def test_best_replay(tmp_path):
+    crc = map_crc(level_path(LEVEL))
+    Replay(LEVEL, [], ticks=500, win=True, crc=crc).save(str(tmp_path / "a.pjr"))
+    Replay(LEVEL, [], ticks=300, win=True, crc=crc).save(str(tmp_path / "b.pjr"))
+    Replay(LEVEL, [], ticks=100, win=False, crc=crc).save(str(tmp_path / "c.pjr"))
+    Replay(LEVEL, [], ticks=100, win=True, crc=crc, build="physics-1").save(str(tmp_path / "d.pjr"))
+    Replay(LEVEL, [], ticks=100, win=True, crc=crc ^ 1).save(str(tmp_path / "e.pjr"))
+    Replay("Galactic Tower", [], ticks=100, win=True, crc=crc).save(str(tmp_path / "f.pjr"))
+    (tmp_path / "g.pjr").write_bytes(b"PJRP")
+    path, replay = best_replay(LEVEL, str(tmp_path))
+    assert path.endswith("b.pjr") and replay.ticks == 300
+    # Katalog sprzed indeksu przeglądany raz; potem najlepszy przebieg bierze się z indeksu
+    assert os.path.exists(str(tmp_path / "best.json"))
+    os.remove(str(tmp_path / "a.pjr"))
+    assert best_replay(LEVEL, str(tmp_path))[0].endswith("b.pjr")
+
+
+# Zapisywane przebiegi aktualizują indeks: tylko krótsze wygrane zastępują najlepszy
+def test_save_run_updates_index(monkeypatch, tmp_path):
+    directory = str(tmp_path / "replays")
+    assert best_replay(LEVEL, directory) is None
+    crc = map_crc(level_path(LEVEL))
+    first = save_run(Replay(LEVEL, [], ticks=500, win=True, crc=crc), directory)
+    save_run(Replay(LEVEL, [], ticks=700, win=True, crc=crc), directory)
+    save_run(Replay(LEVEL, [], ticks=100, win=False, crc=crc), directory)
+    assert best_replay(LEVEL, directory)[0] == first
+    # Nieaktualny wpis (np. po zmianie mapy) zastępuje dowolny nowy wygrany przebieg
+    monkeypatch.setattr("scripts.replay.map_crc", lambda path: crc ^ 1)
+    assert best_replay(LEVEL, directory) is None
+    second = save_run(Replay(LEVEL, [], ticks=900, win=True, crc=crc ^ 1), directory)
+    assert best_replay(LEVEL, directory)[0] == second
+    # Bez skanowania katalogu: odczyt indeksu i jednego pliku
+    monkeypatch.setattr("os.listdir", None)
+    assert best_replay(LEVEL, directory)[1].ticks == 900
@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from test_physics import write_map
+from scripts.entities import Player
+from scripts.simulation import Simulation, PLAYER_SIZE
+from scripts.vecenv import VecEnv, LEFT_KEY, RIGHT_KEY, JUMP_KEY, press_keys, _agent_state, _player_state
+
+
+# Agenci z losowymi klawiszami krok po kroku tacy sami jak pojedyncze symulacje z tym samym wejściem
+def assert_matches_simulations(env, ticks, seed):
+    simulations = [Simulation(env.tilemap, Player(None, env.start_pos, PLAYER_SIZE)) for i in range(env.count)]
+    rng = np.random.default_rng(seed)
+    keys = np.zeros(env.count, dtype=np.int64)
+    held = [0] * env.count
+    for tick in range(ticks):
+        keys = keys ^ ((rng.random((env.count, 3)) < 0.05) @ np.array([LEFT_KEY, RIGHT_KEY, JUMP_KEY]))
+        env.step(keys)
+        for i, simulation in enumerate(simulations):
+            if simulation.player.win:
+                continue
+            press_keys(simulation, held[i], int(keys[i]))
+            held[i] = int(keys[i])
+            simulation.step()
+            assert _agent_state(env, i) == _player_state(simulation.player), (i, tick)
+
+
+@pytest.mark.parametrize("level", ["Galactic Tower", "Winter Wilds", "Corrupted Fields"])
+def test_levels_match_simulation(level):
+    assert_matches_simulations(VecEnv.load(level, count=32), 600, 0)
+
+
+# Agenci wypychani przez wiele klocków daleko poza okno physics_rects
+def test_escaped_agents_match_simulation(tmp_path):
+    tiles = [(x, y, "stone") for y in range(5, 10) for x in range(40)] + [(x, 15, "ice") for x in range(-20, 60)]
+    env = VecEnv.load(path=write_map(tmp_path, tiles), count=32, start_pos=(90, 100))
+    assert_matches_simulations(env, 300, 1)
@@ -0,0 +1,51 @@
+from test_replay import random_run, LEVEL
+from scripts.ranking import SQLiteRankingStore
+from scripts.replay import Replay
+from scripts.verify import verify, verify_all, replay_files
+
+
+def test_verify(tmp_path):
+    simulation = random_run(0, 600)
+    good = Replay.from_simulation(simulation, LEVEL, "test")
+    good.save(str(tmp_path / "good.pjr"))
+    bad = Replay.from_simulation(simulation, LEVEL, "test")
+    bad.total_jumps += 1
+    bad.save(str(tmp_path / "sub" / "jumps.pjr"))
+    # Nazwa poziomu nie może wskazać pliku poza katalogiem map
+    outside = Replay.from_simulation(simulation, LEVEL, "test")
+    outside.level = "../../" + LEVEL
+    outside.save(str(tmp_path / "outside.pjr"))
+    (tmp_path / "broken.pjr").write_bytes(b"PJRP\x01")
+
+    paths = replay_files(str(tmp_path))
+    assert len(paths) == 4
+    problems = {path.rsplit("/", 1)[1]: result[3] for path, result in zip(paths, verify_all(paths, workers=1))}
+    assert problems["good.pjr"] == []
+    assert problems["jumps.pjr"] == ["%d skoków zamiast %d" % (simulation.player.total_jumps, bad.total_jumps)]
+    assert problems["outside.pjr"] == ["nieznany poziom"]
+    assert problems["broken.pjr"][0].startswith("nie da się odczytać")
+    assert verify(str(tmp_path / "good.pjr"))[1:3] == ("test", LEVEL)
+
+
+# Wiersze rankingu sprawdzane z powtórką, na którą wskazują (także spoza sprawdzanego katalogu)
+def test_verify_ranking_rows(tmp_path):
+    simulation = random_run(1, 600)
+    path = str(tmp_path / "ranked" / "run.pjr")
+    Replay.from_simulation(simulation, LEVEL, "ola").save(path)
+    store = SQLiteRankingStore(str(tmp_path / "Ranking.db"))
+    elapsed_ms, jumps = simulation.elapsed_ms(), simulation.player.total_jumps
+    store.add("ola", elapsed_ms, jumps, LEVEL, path)
+    store.add("ola", elapsed_ms - 1000, jumps, LEVEL, path)
+    store.add("ela", elapsed_ms, jumps, LEVEL, path)
+    store.add("ola", 61000, 7, LEVEL)
+    store.add("ola", 61000, 7, LEVEL, str(tmp_path / "missing.pjr"))
+
+    results = verify_all([], workers=1, store=store)
+    store.close()
+    assert [result[0] for result in results] == ["ranking #%d" % i for i in range(1, 6)]
+    # Losowy przebieg nie dochodzi do mety - wynik z rankingu musiałby pochodzić z wygranej
+    assert results[0][3] == ["przebieg bez wygranej"]
+    assert "czas %d ms zamiast %d ms" % (elapsed_ms - 1000, elapsed_ms) in results[1][3]
+    assert "powtórka gracza 'ola'" in results[2][3]
+    assert results[3][3] == ["brak powtórki"]
+    assert results[4][3][0].startswith("brak pliku powtórki")